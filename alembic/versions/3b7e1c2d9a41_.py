@@ -0,0 +1,57 @@
+"""character stat modifiers
+
+Revision ID: 3b7e1c2d9a41
+Revises: 974d171120dc
+Create Date: 2026-10-18 10:12:41.502318
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7e1c2d9a41"
+down_revision: Union[str, Sequence[str], None] = "974d171120dc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "characterstatmodifiers",
+        sa.Column("character", sa.Integer(), nullable=False),
+        sa.Column("stat", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("total_delta", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["character"], ["characters.no"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("character", "stat"),
+        if_not_exists=True,
+    )
+    op.execute(
+        """
+        INSERT OR REPLACE INTO characterstatmodifiers (character, stat, total_delta)
+        SELECT character, stat, SUM(delta) FROM (
+            SELECT characterbuffs.character, buffsstats.stat, buffsstats.increase AS delta
+            FROM buffsstats JOIN characterbuffs ON buffsstats.buff = characterbuffs.buff
+            UNION ALL
+            SELECT characterinjury.character, injurystat.stat, injurystat.penalty
+            FROM injurystat JOIN characterinjury ON injurystat.issue = characterinjury.issue
+            UNION ALL
+            SELECT characterdisability.character, disabilitystat.stat, disabilitystat.penalty
+            FROM disabilitystat JOIN characterdisability ON disabilitystat.issue = characterdisability.issue
+            UNION ALL
+            SELECT characterdisease.character, diseasestat.stat, diseasestat.penalty
+            FROM diseasestat JOIN characterdisease ON diseasestat.issue = characterdisease.issue
+        )
+        GROUP BY character, stat
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("characterstatmodifiers")
@@ -0,0 +1,59 @@
+"""lookup indexes
+
+Revision ID: 8c2f4d6a1b90
+Revises: 3b7e1c2d9a41
+Create Date: 2026-10-18 14:03:27.118904
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2f4d6a1b90"
+down_revision: Union[str, Sequence[str], None] = "3b7e1c2d9a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_characters_player_chat_id", "characters", ["player_chat_id"]),
+    ("ix_characters_clan_no", "characters", ["clan_no"]),
+    ("ix_characterinjury_character", "characterinjury", ["character"]),
+    ("ix_characterbuffs_character", "characterbuffs", ["character"]),
+    ("ix_characterdisease_character", "characterdisease", ["character"]),
+    ("ix_characterdisability_character", "characterdisability", ["character"]),
+    ("ix_injurystat_issue", "injurystat", ["issue"]),
+    ("ix_buffsstats_buff", "buffsstats", ["buff"]),
+    ("ix_diseasestat_issue", "diseasestat", ["issue"]),
+    ("ix_disabilitystat_issue", "disabilitystat", ["issue"]),
+    ("ix_characterinventory_char_no", "characterinventory", ["char_no"]),
+    ("ix_preypile_clan_date_added", "preypile", ["clan", "date_added"]),
+    ("ix_preyterritory_prey", "preyterritory", ["prey"]),
+    ("ix_preyterritory_territory", "preyterritory", ["territory"]),
+    ("ix_players_username", "players", ["username"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+    op.create_index(
+        "ix_characters_active",
+        "characters",
+        ["age"],
+        unique=False,
+        sqlite_where=sa.text("is_dead = 0 AND is_frozen = 0"),
+        if_not_exists=True,
+    )
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_characters_active", table_name="characters", if_exists=True)
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
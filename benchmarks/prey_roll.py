@@ -0,0 +1,109 @@
+"""
+Prey picks per second: the SQL query hunts used to run against the rarity index of reference_cache.
+
+Runs on a throwaway database with random prey, checks first that both paths return the same
+candidates for every roll, then times them.
+
+    python benchmarks/prey_roll.py [--prey 60] [--links 80] [--seconds 2]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+from time import perf_counter
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The engines use a relative path, the benchmark must not touch the real cats.db.
+os.chdir(tempfile.mkdtemp(prefix="catbot-bench-"))
+
+from sqlmodel import and_, select  # noqa: E402
+
+from db import DbBrowser, Prey, PreyTerritory, Seasons, create_tables  # noqa: E402
+from db.cache import reference_cache  # noqa: E402
+
+TERRITORY = 1
+SEASON_MODS = (-25, 0, 10)
+
+
+def seed(prey: int, links: int) -> DbBrowser:
+    db = DbBrowser()
+    db.add_many(
+        Prey(name=f"Дичь {i}", stat="agility", amount=1, rarity=random.randint(1, 100), sum_required=1)
+        for i in range(prey)
+    )
+    db.add_many(
+        PreyTerritory(prey=random.randint(1, prey), territory=random.choice([1, 2])) for _ in range(links)
+    )
+    return db
+
+
+def query_candidates(db: DbBrowser, territory: int, res: int, mod: int) -> list[Prey]:
+    query = select(Prey).join(PreyTerritory).where(
+        and_(Prey.rarity + mod >= res, PreyTerritory.territory == territory)
+    )
+    return db.select_many(query)
+
+
+def check_same_candidates(db: DbBrowser) -> None:
+    for territory in (1, 2):
+        for mod in SEASON_MODS:
+            for res in range(1, 101):
+                old = Counter(p.no for p in query_candidates(db, territory, res, mod))
+                new = Counter(p.no for p in reference_cache.get_prey_for_roll(territory, res, mod))
+                assert old == new, f"territory {territory}, mod {mod}, roll {res}: {old} != {new}"
+
+
+def query_pick(db: DbBrowser) -> Callable[[], Prey | None]:
+    def pick() -> Prey | None:
+        res = random.randint(1, 100)
+        season = db.safe_select_one(select(Seasons).where(Seasons.is_active == True))  # noqa: E712
+        mod = season.hunt_mod if season else 0
+        poss_prey = query_candidates(db, TERRITORY, res, mod)
+        return random.choice(poss_prey) if poss_prey else None
+
+    return pick
+
+
+def index_pick() -> Prey | None:
+    res = random.randint(1, 100)
+    season = reference_cache.get_active_season()
+    mod = season.hunt_mod if season else 0
+    poss_prey = reference_cache.get_prey_for_roll(TERRITORY, res, mod)
+    return random.choice(poss_prey) if poss_prey else None
+
+
+def picks_per_second(pick: Callable[[], Prey | None], seconds: float) -> float:
+    picks = 0
+    start = perf_counter()
+    while (elapsed := perf_counter() - start) < seconds:
+        for _ in range(100):
+            pick()
+        picks += 100
+    return picks / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prey", type=int, default=60, help="prey rows")
+    parser.add_argument("--links", type=int, default=80, help="prey territory rows")
+    parser.add_argument("--seconds", type=float, default=2, help="time spent on each path")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    create_tables()
+    db = seed(args.prey, args.links)
+    check_same_candidates(db)
+    print("Candidates identical for every roll and season mod")
+
+    old = picks_per_second(query_pick(db), args.seconds)
+    new = picks_per_second(index_pick, args.seconds)
+    print(f"query: {old:12,.0f} picks/sec")
+    print(f"index: {new:12,.0f} picks/sec ({new / old:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
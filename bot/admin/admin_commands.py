@@ -12,35 +12,40 @@ from bot.admin.players import PlayerCommandHandler
 from bot.admin.prey import PreyCommandHandler
 from bot.admin.seasons import SeasonCommandHandler
 from bot.admin.system import SystemCommandHandler
-from bot.command_base import CommandBase
-from db.players import DbPlayerConfig
+from bot.command_base import CommandBase, command_names
+from db.players import AsyncDbPlayerConfig
 from exceptions import NoRightException
 from logs.logs import main_logger
 
 
+ADMIN_HANDLERS: list[type[CommandBase]] = [
+    CharacterCommandHandler,
+    PreyCommandHandler,
+    PlayerCommandHandler,
+    InjuryCommandHandler,
+    ClanCommandHandler,
+    HerbCommandHandler,
+    SeasonCommandHandler,
+    SystemCommandHandler,
+]
+
+# Command name -> handler class, the first handler defining a command serves it.
+ADMIN_COMMANDS: dict[str, type[CommandBase]] = {}
+for _handler in ADMIN_HANDLERS:
+    for _name in command_names(_handler):
+        ADMIN_COMMANDS.setdefault(_name, _handler)
+
+
 class AdminCommandHandler(CommandBase):
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.player_db = DbPlayerConfig()
-
-    @property
-    def subclasses(self) -> list:
-        return [
-            CharacterCommandHandler,
-            PreyCommandHandler,
-            PlayerCommandHandler,
-            InjuryCommandHandler,
-            ClanCommandHandler,
-            HerbCommandHandler,
-            SeasonCommandHandler,
-            SystemCommandHandler,
-        ]
+        self.player_db = AsyncDbPlayerConfig()
 
     async def __aenter__(self):
         main_logger.debug(
             f"Admin command manager starting with command: {self.command}\nparams: {self.text}"
         )
-        if not self.player_db.check_if_user_is_admin(self.user.id):
+        if not await self.player_db.check_if_user_is_admin(self.user.id):
             self.context.chat_data.update(  # type: ignore
                 {"exc": {"admin_error": [self.user.id, self.user.username]}}
             )
@@ -51,16 +56,14 @@ class AdminCommandHandler(CommandBase):
         main_logger.debug("Admin command handler shutting down")
 
     async def route(self):
-        for handler in self.subclasses:
-            if self.command in handler.__dict__:
-                cls = handler(self.update, self.context)
-                try:
-                    await getattr(cls, self.command)()
-                except TelegramError as err:
-                    raise TelegramError(str(err)) from err
-                except Exception as err:
-                    await self.context.bot.send_message(self.chat_id, "Ошибка. Тагните Клинфа.")
-                    main_logger.error(f"Error in {self.command}: {err}\n{traceback.format_exc()}")
-                break
-        else:
+        if not (handler := ADMIN_COMMANDS.get(self.command)):
             await self.unknown_command()
+            return
+        cls = handler(self.update, self.context)
+        try:
+            await getattr(cls, self.command)()
+        except TelegramError as err:
+            raise TelegramError(str(err)) from err
+        except Exception as err:
+            await self.context.bot.send_message(self.chat_id, "Ошибка. Тагните Клинфа.")
+            main_logger.error(f"Error in {self.command}: {err}\n{traceback.format_exc()}")
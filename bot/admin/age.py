@@ -1,3 +1,5 @@
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -13,15 +15,15 @@ class SeasonCommandHandler(CommandBase):
     
     async def view_all_ages(self):
         ages = self.age_db.get_ages()
-        return self.view_list_from_db(ages)
+        await self.view_list_from_db(ages)
     
     async def add_age(self):
         params = self.make_params_for_db_entity_create(Ages)
-        return self.age_db.new_age(params)
+        return await asyncio.to_thread(self.age_db.new_age, params)
     
     async def set_food_req(self):
         name, val = self.text.strip().split("\n")
         if not self.validate_setting(val):
             await self.bot.send_message(self.chat_id, "Возраст должен быть целым числом больше 0!")
             return
-        await self.bot.send_message(self.chat_id, str(self.age_db.edit_food_req(name.strip().capitalize(), val)))
+        await self.bot.send_message(self.chat_id, str(await asyncio.to_thread(self.age_db.edit_food_req, name.strip().capitalize(), val)))
@@ -1,3 +1,5 @@
+import asyncio
+
 from sqlalchemy.exc import IntegrityError
 from telegram import Update
 from telegram.ext import ContextTypes
@@ -39,7 +41,7 @@ class CharacterCommandHandler(CommandBase):
             main_logger.info(f"Попытка создания кота с одинаковым именем {name}")
             return
         try:
-            self.char_config.add_character(params_dict)
+            await asyncio.to_thread(self.char_config.add_character, params_dict)
             await self.context.bot.send_message(self.chat_id, "Character added!")
         except NotRealClanError:
             await self.bot.send_message(
@@ -65,14 +67,14 @@ class CharacterCommandHandler(CommandBase):
         chat_id = self.player_db.get_player_by_username(self.text).chat_id
         chars = self.char_config.get_chars_for_player(chat_id)
         if chars:
-            await self.view_list_from_db(chars)
+            await self.view_list_from_db(self.char_config.render_chars(chars))
         else:
             await self.bot.send_message(self.chat_id, 'У этого игрока нет персонажей!')
 
     async def view_all_chars(self):
         chars = self.char_config.get_all_chars()
         if chars:
-            await self.view_list_from_db(chars)
+            await self.view_list_from_db(self.char_config.render_chars(chars))
         else:
             await self.bot.send_message(self.chat_id, 'В игре нет персонажей!')
 
@@ -92,7 +94,7 @@ class CharacterCommandHandler(CommandBase):
             await self.bot.send_message(self.chat_id, "Пожалуйста, укажите причину изменения характеристик")
             return
         try:
-            self.char_config.edit_character(name, params_dict, reason)
+            await asyncio.to_thread(self.char_config.edit_character, name, params_dict, reason)
             new_char = self.char_config.get_char_by_name(
                 params_dict.get("name") or name.capitalize()
             )
@@ -104,7 +106,7 @@ class CharacterCommandHandler(CommandBase):
 
     async def freeze(self):
         name = self.text.strip().capitalize()
-        self.char_config.edit_freeze_char_by_name(name)
+        await asyncio.to_thread(self.char_config.edit_freeze_char_by_name, name)
         await self.bot.send_message(
             self.chat_id,
             f"Персонаж {name} заморожен.",
@@ -113,7 +115,7 @@ class CharacterCommandHandler(CommandBase):
 
     async def unfreeze(self):
         name = self.text.strip().capitalize()
-        self.char_config.edit_freeze_char_by_name(name, False)
+        await asyncio.to_thread(self.char_config.edit_freeze_char_by_name, name, False)
         await self.bot.send_message(
             self.chat_id,
             f"Персонаж {name} разморожен.",
@@ -127,8 +129,8 @@ class CharacterCommandHandler(CommandBase):
         else:
             await self.bot.send_message(self.chat_id, "Пожалуйста, укажите причину убийства")
             return
-        self.char_config.edit_death_char_by_name(
-            name.capitalize().strip(), self.user.username, reason, True
+        await asyncio.to_thread(
+            self.char_config.edit_death_char_by_name, name.capitalize().strip(), self.user.username, reason, True
         )
         await self.bot.send_message(
             self.chat_id,
@@ -143,8 +145,8 @@ class CharacterCommandHandler(CommandBase):
         else:
             await self.bot.send_message(self.chat_id, "Пожалуйста, укажите причину воскрешения")
             return
-        self.char_config.edit_death_char_by_name(
-            name.capitalize().strip(), self.user.username, reason, False
+        await asyncio.to_thread(
+            self.char_config.edit_death_char_by_name, name.capitalize().strip(), self.user.username, reason, False
         )
         await self.bot.send_message(
             self.chat_id,
@@ -1,3 +1,5 @@
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -5,6 +7,7 @@ from bot.command_base import CommandBase
 from db import Clans
 from db.characters import DbCharacterConfig
 from db.clans import DbClanConfig
+from db.renderers import Renderer
 from utils import prepare_for_db
 
 
@@ -13,6 +16,7 @@ class ClanCommandHandler(CommandBase):
         super().__init__(update, context)
         self.clan_db = DbClanConfig()
         self.char_db = DbCharacterConfig()
+        self.renderer = Renderer()
 
     async def add_clan(self):
         params_dict = {}
@@ -31,7 +35,7 @@ class ClanCommandHandler(CommandBase):
             return
         params_dict.update({"name": name.capitalize()})
 
-        self.clan_db.add_new_clan(params_dict)
+        await asyncio.to_thread(self.clan_db.add_new_clan, params_dict)
         if 'is_true_clan' in params_dict.keys() and params_dict.get('is_true_clan'):
             await self.context.bot.send_message(
                 self.chat_id, f"Клан {name} добавлен успешно!"
@@ -55,21 +59,21 @@ class ClanCommandHandler(CommandBase):
     async def view_all_clans(self):
         clan_list = self.clan_db.get_all_clans()
         if clan_list:
-            await self.view_list_from_db(clan_list)
+            await self.view_list_from_db(self.renderer.render_clans(clan_list))
         else:
             await self.bot.send_message(self.chat_id, 'Кланов еще нет :(')
 
     async def view_all_territories(self):
         terr_list = self.clan_db.get_all_territories()
         if terr_list:
-            await self.view_list_from_db(terr_list)
+            await self.view_list_from_db(self.renderer.render_clans(terr_list))
         else:
             await self.bot.send_message(self.chat_id, 'Территорий еще нет :(')
 
     async def delete_clan(self):
         clan_name = self.text.capitalize()
         clan = self.clan_db.get_clan_by_name(clan_name)
-        self.clan_db.delete_clan_by_no(clan.no)
+        await asyncio.to_thread(self.clan_db.delete_clan_by_no, clan.no)
         await self.bot.send_message(
             self.chat_id, f"Клан или территория {clan.name} удалена успешно."
         )
@@ -88,7 +92,7 @@ class ClanCommandHandler(CommandBase):
                 self.chat_id, f"Клан под названием {clan_name} не найден."
             )
             return
-        self.clan_db.appoint_leader(clan.no, char.no)
+        await asyncio.to_thread(self.clan_db.appoint_leader, clan.no, char.no)
         await self.bot.send_message(
             self.chat_id, f"Новый лидер {char.name} для клана {clan.name} добавлен успешно."
         )
@@ -99,7 +103,7 @@ class ClanCommandHandler(CommandBase):
 
     async def remove_leader(self):
         clan = self.text.capitalize().strip()
-        self.clan_db.remove_leader(clan)
+        await asyncio.to_thread(self.clan_db.remove_leader, clan)
         await self.bot.send_message(
             self.chat_id, f"Лидер для клана {clan} удален успешно."
         )
@@ -1,3 +1,5 @@
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -19,7 +21,7 @@ class InjuryCommandHandler(CommandBase):
         for item in params_list:
             col, value = prepare_for_db(item.strip().split(":", 1))
             params_dict.update({col.strip(): value.strip()})
-        self.injury_db.add_new_injury(name, params_dict)
+        await asyncio.to_thread(self.injury_db.add_new_injury, name, params_dict)
 
     async def add_injury_help(self):
         attrs = "\n".join(InjuryStat.attrs())
@@ -1,3 +1,5 @@
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -12,7 +14,7 @@ class PlayerCommandHandler(CommandBase):
         self.player_db = DbPlayerConfig(self.user.username)
 
     async def ban(self):
-        success, reply = self.player_db.ban_player(self.text)
+        success, reply = await asyncio.to_thread(self.player_db.ban_player, self.text)
         await self.context.bot.send_message(self.chat_id, reply)
         if success:
             player = self.player_db.get_player_by_username(self.text)
@@ -24,7 +26,7 @@ class PlayerCommandHandler(CommandBase):
             )
 
     async def unban(self):
-        success, reply = self.player_db.unban_player(self.text)
+        success, reply = await asyncio.to_thread(self.player_db.unban_player, self.text)
         await self.bot.send_message(self.chat_id, reply)
         if success:
             player = self.player_db.get_player_by_username(self.text)
@@ -38,12 +40,12 @@ class PlayerCommandHandler(CommandBase):
 
     @superuser_command
     async def promote(self):
-        reply = self.player_db.promote_or_demote(self.text, True)
+        reply = await asyncio.to_thread(self.player_db.promote_or_demote, self.text, True)
         await self.bot.send_message(self.chat_id, reply)
 
     @superuser_command
     async def demote(self):
-        reply = self.player_db.promote_or_demote(self.text, False)
+        reply = await asyncio.to_thread(self.player_db.promote_or_demote, self.text, False)
         await self.bot.send_message(self.chat_id, reply)
 
     async def view_all_players(self):
@@ -1,3 +1,5 @@
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -5,6 +7,7 @@ from bot.command_base import CommandBase
 from db import Prey
 from db.clans import DbClanConfig
 from db.prey import DbPreyConfig
+from db.renderers import Renderer
 from utils import prepare_for_db
 
 
@@ -13,6 +16,7 @@ class PreyCommandHandler(CommandBase):
         super().__init__(update, context)
         self.prey_db = DbPreyConfig()
         self.terr_db = DbClanConfig()
+        self.renderer = Renderer()
 
     async def add_prey(self):
         params_dict = {}
@@ -25,7 +29,7 @@ class PreyCommandHandler(CommandBase):
                 col and value and (col in Prey.attrs() or (col + "*") in Prey.attrs())
             ):  # TODO: убрать ебучий костыль
                 params_dict.update({col.strip(): value.strip()})
-        self.prey_db.add_new_prey(params_dict)
+        await asyncio.to_thread(self.prey_db.add_new_prey, params_dict)
         await self.context.bot.send_message(
             self.chat_id, f"Дичь {name} добавлена успешно!"
         )
@@ -42,11 +46,11 @@ class PreyCommandHandler(CommandBase):
 
     async def view_all_prey(self):
         all_prey = self.prey_db.get_all_prey()
-        await self.view_list_from_db(all_prey)
+        await self.view_list_from_db(self.renderer.render_prey(all_prey))
 
     async def delete_prey(self):
         prey = self.prey_db.get_prey_by_name(self.text.capitalize())
-        self.prey_db.delete(prey)
+        await asyncio.to_thread(self.prey_db.delete, prey)
         await self.context.bot.send_message(self.chat_id, f'Дичь {self.text.capitalize()} удалена успешно.')
 
     async def delete_prey_help(self):
@@ -67,7 +71,7 @@ class PreyCommandHandler(CommandBase):
                     )
                     continue
                 params_dict.update({col.strip(): value.strip()})
-        self.prey_db.edit_prey_by_name(name.capitalize(), params_dict)
+        await asyncio.to_thread(self.prey_db.edit_prey_by_name, name.capitalize(), params_dict)
         upd_prey = self.prey_db.get_prey_by_name(name)
         await self.bot.send_message(self.chat_id, str(upd_prey))
 
@@ -75,7 +79,7 @@ class PreyCommandHandler(CommandBase):
         name, terr = self.text.strip().split("\n")
         prey = self.prey_db.get_prey_by_name(name)
         territory = self.terr_db.get_clan_by_name(terr)
-        self.prey_db.new_prey_territory(prey, territory)
+        await asyncio.to_thread(self.prey_db.new_prey_territory, prey, territory)
         await self.context.bot.send_message(
             self.chat_id,
             f"Территория проживания {territory.name} для дичи {prey.name} добавлена успешно.",
@@ -85,7 +89,7 @@ class PreyCommandHandler(CommandBase):
         name, terr = self.text.strip().split("\n")
         prey = self.prey_db.get_prey_by_name(name)
         territory = self.terr_db.get_clan_by_name(terr)
-        self.prey_db.remove_prey_terr(prey, territory)
+        await asyncio.to_thread(self.prey_db.remove_prey_terr, prey, territory)
         await self.context.bot.send_message(
             self.chat_id,
             f"Территория проживания {territory.name} для дичи {prey.name} удалена успешно.",
@@ -94,7 +98,7 @@ class PreyCommandHandler(CommandBase):
     async def reset_prey_territories(self):
         name, terr = self.text.strip().split("\n")
         prey = self.prey_db.get_prey_by_name(name)
-        self.prey_db.reset_territories(prey, terr)
+        await asyncio.to_thread(self.prey_db.reset_territories, prey, terr)
         prey = self.prey_db.get_prey_by_name(name)
         await self.context.bot.send_message(
             self.chat_id, f"Обновленная дичь: {str(prey)}"
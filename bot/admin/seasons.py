@@ -1,3 +1,5 @@
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -21,15 +23,15 @@ class SeasonCommandHandler(CommandBase):
     
     async def add_season(self):
         params = await self.make_params_for_db_entity_create(Seasons)
-        self.season_db.add_season(params)
+        await asyncio.to_thread(self.season_db.add_season, params)
         await self.bot.send_message(self.chat_id, "Season added")
     
     async def delete_season(self):
         season = self.text.capitalize().strip()
-        self.season_db.remove_season(season)
+        await asyncio.to_thread(self.season_db.remove_season, season)
         await self.bot.send_message(self.chat_id, "Season deleted")
     
     async def edit_season(self):
         season, params = await self.make_params_for_db_entity_edit(Seasons)
-        self.season_db.edit_season(season, params)
+        await asyncio.to_thread(self.season_db.edit_season, season, params)
         await self.bot.send_message(self.chat_id, "Season edited")
\ No newline at end of file
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 
 from telegram import Update
@@ -7,11 +8,15 @@ from apscheduler.triggers.cron import CronTrigger
 
 from bot.buttons import get_job_keyboard
 from bot.command_base import CommandBase, CallbackBase
+from bot.state import StateName, clear_state, get_state, set_state
+from db import find_table_scans
+from db.cache import reference_cache
+from db.clans import DbClanConfig
 from db.decorators import superuser_command
 from db.seasons import SeasonsConfig
 from db.settings import SettingConfig
 from logs.logs import system_logger as logger
-from schedule import scheduler
+from schedule import run_job, scheduler
 
 
 def validate_setting(val: Any) -> bool:
@@ -36,7 +41,7 @@ class SystemCommandHandler(CommandBase):
     @superuser_command
     async def advance_seasons(self):
         logger.info(f"Advancing seasons {self.user.username}")
-        self.season_db.set_next_season()
+        await asyncio.to_thread(self.season_db.set_next_season)
     
     @superuser_command
     async def set_max_hunts(self):
@@ -44,7 +49,15 @@ class SystemCommandHandler(CommandBase):
             await self.bot.send_message(self.chat_id, "Количество охот должно быть положительным целым числом!")
             return
         logger.info(f"hunt_attempts change to {self.text} {self.user.username}")
-        self.setting_db.set_setting("hunt_attempts", self.text)
+        await asyncio.to_thread(self.setting_db.set_setting, "hunt_attempts", self.text)
+
+    @superuser_command
+    async def set_max_herbs(self):
+        if not self.validate_setting(self.text):
+            await self.bot.send_message(self.chat_id, "Количество сборов трав должно быть положительным целым числом!")
+            return
+        logger.info(f"herb_attempts change to {self.text} {self.user.username}")
+        await asyncio.to_thread(self.setting_db.save_setting, "herb_attempts", self.text)
     
     @superuser_command
     async def set_max_hunger(self):
@@ -52,7 +65,7 @@ class SystemCommandHandler(CommandBase):
             await self.bot.send_message(self.chat_id, "Максимальная степень голода должна быть положительным целым числом!")
             return
         logger.info(f"max_hunger change to {self.text} {self.user.username}")
-        self.setting_db.set_setting("max_hunger", self.text)
+        await asyncio.to_thread(self.setting_db.set_setting, "max_hunger", self.text)
     
     @superuser_command
     async def add_new_hunger_pen(self):
@@ -64,7 +77,7 @@ class SystemCommandHandler(CommandBase):
             await self.bot.send_message(self.chat_id, "Штраф должен быть положительным целым числом!")
             return
         curr_pens = self.setting_db.curr_hunger_pens()
-        if severity in curr_pens.keys():
+        if int(severity) in curr_pens:
             await self.bot.send_message(
                 self.chat_id,
                 "Для данной степени голода уже настроен штраф. Воспользуйтесь командой /set_hunger_pen",
@@ -72,7 +85,7 @@ class SystemCommandHandler(CommandBase):
             return
         params = {'name': f'hunger_pen_{severity}', 'value': value}
         logger.info(f"new hunger_pen_{severity} {value} for {self.user.username}")
-        self.setting_db.insert_new_setting(params)
+        await asyncio.to_thread(self.setting_db.insert_new_setting, params)
     
     @superuser_command
     async def set_hunger_pen(self):
@@ -84,14 +97,14 @@ class SystemCommandHandler(CommandBase):
             await self.bot.send_message(self.chat_id, "Штраф должен быть положительным целым числом!")
             return
         curr_pens = self.setting_db.curr_hunger_pens()
-        if severity not in curr_pens.keys():
+        if int(severity) not in curr_pens:
             await self.bot.send_message(
                 self.chat_id,
                 "Для данной степени голода еще не настроен штраф. Воспользуйтесь командой /add_new_hunger_pen",
             )
             return
         logger.info(f"update hunger_pen_{severity} {value} for {self.user.username}")
-        self.setting_db.set_setting(f"hunger_pen_{severity}", value)
+        await asyncio.to_thread(self.setting_db.set_setting, f"hunger_pen_{severity}", value)
 
     async def view_current_jobs(self):
         res = ""
@@ -112,7 +125,7 @@ class SystemCommandHandler(CommandBase):
     @superuser_command
     async def modify_job(self):
         text = "Эта комманда позволяет менять параметры запуска джоба. Будьте КРАЙНЕ осторожны с ее использованием."
-        self.context.user_data.update({"state": {"name": "settings", "action": "view_modify"}})
+        set_state(self.context, StateName.SETTINGS, action="view_modify")
         logger.info(f"modify_job call for {self.user.username}")
         await self.bot.send_message(self.chat_id, text, reply_markup=get_job_keyboard(self.jobs))
     
@@ -121,16 +134,82 @@ class SystemCommandHandler(CommandBase):
         for job in self.jobs:
             if job.name.lower() == self.text.lower():
                 logger.info(f"run_job {job.name} call for {self.user.username}")
-                job.func()
+                await run_job(job)
+                await self.bot.send_message(self.chat_id, f"Джоба {job.name} выполнена")
                 break
         else:
-            self.bot.send_message(self.chat_id, "Джоба с таким названием не существует")
+            await self.bot.send_message(self.chat_id, "Джоба с таким названием не существует")
     
+    @superuser_command
+    async def rebuild_stat_modifiers(self):
+        logger.info(f"Stat modifiers rebuild {self.user.username}")
+        drift = await asyncio.to_thread(self.setting_db.rebuild_stat_modifiers)
+        await self.bot.send_message(
+            self.chat_id, f"Модификаторы характеристик пересчитаны. Исправлено записей: {drift}"
+        )
+
+    @superuser_command
+    async def check_query_plans(self):
+        logger.info(f"Query plan check {self.user.username}")
+        scans = await asyncio.to_thread(find_table_scans)
+        if not scans:
+            await self.bot.send_message(self.chat_id, "Все проверяемые запросы используют индексы.")
+            return
+        text = "\n".join(f"{name}: {'; '.join(steps)}" for name, steps in scans.items())
+        await self.bot.send_message(self.chat_id, f"Полный просмотр таблиц в запросах:\n{text}")
+
+    @superuser_command
+    async def view_cache_stats(self):
+        stats = reference_cache.stats()
+        await self.bot.send_message(
+            self.chat_id,
+            f"Версия справочников: {stats['version']}\nПопаданий: {stats['hits']}\nПромахов: {stats['misses']}",
+        )
+
+    def _parse_pile_setting(self) -> tuple[str | None, str]:
+        if ":" not in self.text:
+            return None, self.text.strip()
+        clan, value = list(map(str.strip, self.text.split(":", 1)))
+        try:
+            return str(DbClanConfig().get_clan_by_no(int(clan)).no), value
+        except ValueError:
+            found = DbClanConfig().get_clan_by_name(clan)
+            return (str(found.no) if found else ""), value
+        except AttributeError:
+            return "", value
+
+    @superuser_command
+    async def set_pile_cut(self):
+        clan, value = self._parse_pile_setting()
+        if clan == "":
+            await self.bot.send_message(self.chat_id, "Клан не найден!")
+            return
+        try:
+            assert 0 <= float(value) <= 1
+        except Exception:
+            await self.bot.send_message(self.chat_id, "Доля срезаемой дичи должна быть числом от 0 до 1!")
+            return
+        name = f"pile_cut_share_{clan}" if clan else "pile_cut_share"
+        logger.info(f"{name} change to {value} {self.user.username}")
+        await asyncio.to_thread(self.setting_db.save_setting, name, value)
+
+    @superuser_command
+    async def set_pile_max_age(self):
+        clan, value = self._parse_pile_setting()
+        if not clan:
+            await self.bot.send_message(self.chat_id, "Укажите клан в формате клан: дни")
+            return
+        if value != "0" and not self.validate_setting(value):
+            await self.bot.send_message(self.chat_id, "Срок хранения должен быть целым числом дней, 0 отключает его!")
+            return
+        logger.info(f"pile_max_age_{clan} change to {value} {self.user.username}")
+        await asyncio.to_thread(self.setting_db.save_setting, f"pile_max_age_{clan}", value)
+
     @superuser_command
     async def set_max_age(self):
         if not self.validate_setting(self.text):
             await self.bot.send_message(self.chat_id, "Максимальный возраст должен быть положительным целым числом!")
-        self.setting_db.set_setting("max_age", self.text)
+        await asyncio.to_thread(self.setting_db.set_setting, "max_age", self.text)
 
 class SystemConv(CallbackBase):
 
@@ -138,9 +217,9 @@ class SystemConv(CallbackBase):
         super().__init__(update, context)
     
     async def route_conv(self):
-        if not (state := self.context.user_data.get("state")):
+        if not (state := get_state(self.context)):
             return None
-        match state.get("action"):
+        match state.action:
             case "view_modify":
                 job_id = self.update.callback_query.data
                 job: Job = scheduler.get_job(job_id)
@@ -148,7 +227,7 @@ class SystemConv(CallbackBase):
                                   "Для редактирования джоба в следующем сообщении введите параметры триггера",
                                   "Правила можно посмотреть в документации:",
                                   "https://docs.google.com/spreadsheets/d/1X3CUqSVVF1FrHxGJyhlO8QApehsUR5AnN9oqJJSl_K0/edit?gid=0#gid=0"])
-                self.context.user_data.update({"state": {"name": "settings", "action": "set_trigger", "id": job.id}})
+                set_state(self.context, StateName.SETTINGS, action="set_trigger", job_id=job.id)
                 logger.info(f"modify_job chosen job {job.name} for {self.user.username}")
                 await self.bot.send_message(self.chat_id, text)
 
@@ -158,17 +237,16 @@ class SystemTextCommand:
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         self.update = update
         self.context = context
-        self.job_id: str = context.user_data["state"]["id"]
-    
+
     async def job_modify(self):
-        job: Job = scheduler.get_job(self.job_id)
+        job: Job = scheduler.get_job(get_state(self.context).job_id)
         params_list = self.update.message.text.strip().split(";")
         params = {}
         for param in params_list:
             param = param.strip()
             k, v = param.split("=")
             params.update({k.strip(): v.strip()})
-        job = job.modify(trigger=CronTrigger(**params))
-        self.context.user_data.__delitem__("state")
+        job = await asyncio.to_thread(job.modify, trigger=CronTrigger(**params))
+        clear_state(self.context)
         logger.info(f"modify_job params {params} for {self.update.message.from_user.username}")
         await self.context.bot.send_message(self.update.effective_chat.id, f"Джоб {job.name} изменен успешно")
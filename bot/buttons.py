@@ -2,11 +2,9 @@ from apscheduler.job import Job
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 from bot.const import (CARRY_PREY, CLEAR_INVENTORY, EAT_PREY, LEAVE_PREY, TAKE_PREY,
-                       VIEW_INVENTORY)
+                       TURN_PAGE, VIEW_INVENTORY)
 from db import Prey
-from db.inventory import InventoryManager
-from db.herbs import HerbConfig
-from db.prey import DbPreyConfig
+from db.inventory import InventoryItem
 
 
 def get_hunt_keyboard() -> InlineKeyboardMarkup:
@@ -30,17 +28,15 @@ def get_base_inv_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
-def get_view_inv_keyboard(no: int) -> InlineKeyboardMarkup:
-    inv = InventoryManager().get_char_inventory(no)
+def get_view_inv_keyboard(inv: list[InventoryItem]) -> InlineKeyboardMarkup:
     keyboard = [[]]
     for i in inv:
-        type = i.type
-        if type == 'prey':
-            item = DbPreyConfig().get_prey_by_no(i.item)
-            keyboard[0].append(InlineKeyboardButton(item.name, callback_data=f"Дичь:{item.no}"))
-        elif type == 'herb':
-            item = HerbConfig().get_herb_by_no(i.item)
-            keyboard[0].append(InlineKeyboardButton(item.name, callback_data=f"Трава:{item.no}"))
+        if i.name is None:
+            continue
+        if i.type == 'prey':
+            keyboard[0].append(InlineKeyboardButton(i.name, callback_data=f"Дичь:{i.item}"))
+        elif i.type == 'herb':
+            keyboard[0].append(InlineKeyboardButton(i.name, callback_data=f"Трава:{i.item}"))
     return InlineKeyboardMarkup(keyboard)
 
 
@@ -79,3 +75,19 @@ def get_pile_prey_keyboard():
         ]
     ]
     return InlineKeyboardMarkup(keyboard)
+
+
+def get_page_keyboard(list_id: str, page: int, total: int) -> InlineKeyboardMarkup | None:
+    """Prev/next buttons of a paginated list, page is 0-based."""
+    if total < 2:
+        return None
+    keyboard = [[]]
+    if page > 0:
+        keyboard[0].append(
+            InlineKeyboardButton(f"« {page}/{total}", callback_data=f"{TURN_PAGE}:{list_id}:{page - 1}")
+        )
+    if page < total - 1:
+        keyboard[0].append(
+            InlineKeyboardButton(f"{page + 2}/{total} »", callback_data=f"{TURN_PAGE}:{list_id}:{page + 1}")
+        )
+    return InlineKeyboardMarkup(keyboard)
@@ -1,14 +1,52 @@
+from inspect import iscoroutinefunction
+from io import BytesIO
 from os import getenv
-from typing import Any
+from typing import Any, Iterable
+from uuid import uuid4
 
 from sqlmodel import SQLModel
 from telegram import Bot, Update, User
 from telegram.ext import ContextTypes
 
+from bot.buttons import get_page_keyboard
 from exceptions import EditError
 from logs.logs import main_logger
 
 
+MESSAGE_LIMIT = 4096
+DOCUMENT_PAGES = 20
+STORED_LISTS = 5
+SEPARATOR = "______"
+
+
+def paginate(items: Iterable[str], limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Packs items, each followed by a separator line, into pages of at most limit characters."""
+    pages: list[str] = []
+    page: list[str] = []
+    size = 0
+    for item in items:
+        entry = f"{item}\n{SEPARATOR}"
+        # An item longer than a message is cut into several pages of its own.
+        for start in range(0, len(entry), limit):
+            chunk = entry[start:start + limit]
+            if page and size + 1 + len(chunk) > limit:
+                pages.append("\n".join(page))
+                page, size = [], 0
+            size += len(chunk) + (1 if page else 0)
+            page.append(chunk)
+    if page:
+        pages.append("\n".join(page))
+    return pages
+
+
+def command_names(handler: type) -> set[str]:
+    """Public coroutine methods defined on the handler class itself, i.e. the commands it serves."""
+    return {
+        name for name, attr in vars(handler).items()
+        if not name.startswith("_") and iscoroutinefunction(attr)
+    }
+
+
 class CommandBase:
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         self.update = update
@@ -24,14 +62,32 @@ class CommandBase:
     async def unknown_command(self):
         await self.context.bot.send_message(self.chat_id, "Неизвестная команда!")
 
-    async def view_list_from_db(self, db_res, default: str = "Выборка пуста."):
-        res = ""
-        if not db_res:
+    async def view_list_from_db(self, db_res, default: str = "Выборка пуста.", as_document: bool | None = None):
+        """
+        Sends the list page by page, later pages are turned with the inline keyboard.
+
+        :param db_res: entities or already rendered strings
+        :param default: message sent for an empty list
+        :param as_document: send the list as one text file, by default only lists longer than DOCUMENT_PAGES pages
+        """
+        pages = paginate(str(i) for i in db_res)
+        if not pages:
             await self.bot.send_message(self.chat_id, default)
             return
-        for i in db_res:
-            res = "\n".join([res, str(i), "______"])
-        await self.context.bot.send_message(self.chat_id, res)
+        if as_document or (as_document is None and len(pages) > DOCUMENT_PAGES):
+            await self.bot.send_document(
+                self.chat_id, BytesIO("\n".join(pages).encode()), filename=f"{self.command}.txt"
+            )
+            return
+        list_id = uuid4().hex[:8]
+        if len(pages) > 1:
+            stored = self.context.chat_data.setdefault("pages", {})
+            stored[list_id] = pages
+            while len(stored) > STORED_LISTS:
+                del stored[next(iter(stored))]
+        await self.bot.send_message(
+            self.chat_id, pages[0], reply_markup=get_page_keyboard(list_id, 0, len(pages))
+        )
 
     @staticmethod
     async def __set_explicit_none(value: Any) -> Any | None:
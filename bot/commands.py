@@ -1,14 +1,37 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from bot.admin.admin_commands import AdminCommandHandler
+from bot.admin.admin_commands import ADMIN_COMMANDS, AdminCommandHandler
 from bot.admin.system import SystemConv, SystemTextCommand
+from bot.command_base import CallbackBase, command_names
 from bot.common_commands import CommonCommandHandler
-from bot.conversations import HuntConversation, InvBaseConv, InvViewConv, PreyViewConv, PileConv
+from bot.const import TURN_PAGE
+from bot.locks import locks
+from bot.conversations import HuntConversation, InvBaseConv, InvViewConv, PageConv, PreyViewConv, PileConv
+from bot.state import StateName, get_state
 from exceptions import WrongChatError
 from logs.logs import main_logger as logger
 
 
+COMMON_COMMANDS = command_names(CommonCommandHandler)
+
+# State name -> handler class and the method answering text messages in that state.
+TEXT_ROUTES: dict[StateName, tuple[type, str]] = {
+    StateName.SETTINGS: (SystemTextCommand, "job_modify"),
+}
+
+# State name -> handler class and the method answering button presses in that state.
+CALLBACK_ROUTES: dict[StateName, tuple[type[CallbackBase], str]] = {
+    StateName.HUNT_COMPLETED: (HuntConversation, "action"),
+    StateName.INV_BASE: (InvBaseConv, "action"),
+    StateName.INV_VIEW: (InvViewConv, "action"),
+    StateName.PREY_VIEW: (PreyViewConv, "action"),
+    StateName.SETTINGS: (SystemConv, "route_conv"),
+    StateName.PILE_VIEW: (PileConv, "pile_view"),
+    StateName.PILE_PREY: (PileConv, "pile_prey"),
+}
+
+
 class CommandRouter:
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         self.command: str = update.message.text.split(" ", 1)[0].replace("/", "")  # type: ignore
@@ -16,63 +39,46 @@ class CommandRouter:
         self.context = context
 
     async def route(self):
-        if self.command in CommonCommandHandler.__dict__:
+        if self.command in COMMON_COMMANDS:
             try:
                 async with CommonCommandHandler(self.update, self.context) as c:
                     await getattr(c, self.command)()
             except WrongChatError:
                 pass
-        else:
+        elif self.command in ADMIN_COMMANDS:
             async with AdminCommandHandler(self.update, self.context) as c:
                 await c.route()
+        else:
+            await self.context.bot.send_message(self.update.effective_chat.id, "Неизвестная команда!")  # type: ignore
 
 
 class ConversationRouter:
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         self.update = update
         self.context = context
-        self.system = SystemTextCommand(update, context)
 
     async def route(self):
-        if state := self.context.user_data.get("state"):
-            match state.get("name"):
-                case "settings":
-                    await self.system.job_modify()
+        if (state := get_state(self.context)) and state.name in TEXT_ROUTES:
+            handler, method = TEXT_ROUTES[state.name]
+            await getattr(handler(self.update, self.context), method)()
 
 
 class CallbackRouter:
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         self.update = update
         self.context = context
-        self.hunt_conv = HuntConversation(update, context)
-        self.inv_base = InvBaseConv(update, context)
-        self.inv_single = InvViewConv(update, context)
-        self.prey_view = PreyViewConv(update, context)
-        self.settings = SystemConv(update, context)
-        self.pile_conv = PileConv(update, context)
 
     async def route(self):
-        if state := self.context.user_data.get("state", {}):
+        keys = []
+        if self.update.callback_query.data.startswith(f"{TURN_PAGE}:"):
+            handler, method = PageConv, "turn_page"
+        elif (state := get_state(self.context)) and state.name in CALLBACK_ROUTES:
             logger.debug(f"Starting callback routing with state: {state}")
-            match state.get("name"):
-                case "hunt_completed":
-                    async with self.hunt_conv as conv:
-                        await conv.action()
-                case "inv_base":
-                    async with self.inv_base as conv:
-                        await conv.action()
-                case "inv_view":
-                    async with self.inv_single as conv:
-                        await conv.action()
-                case "prey_view":
-                    async with self.prey_view as conv:
-                        await conv.action()
-                case "settings":
-                    async with self.settings as conv:
-                        await conv.route_conv()
-                case "pile_view":
-                    async with self.pile_conv as conv:
-                        await conv.pile_view()
-                case "pile_prey":
-                    async with self.pile_conv as conv:
-                        await conv.pile_prey()
+            handler, method = CALLBACK_ROUTES[state.name]
+            # Eating, pile takes and inventory moves of one character never overlap.
+            if state.char_no:
+                keys.append(("character", state.char_no))
+        else:
+            return
+        async with locks.hold(*keys), handler(self.update, self.context) as conv:
+            await getattr(conv, method)()
@@ -1,13 +1,17 @@
+from functools import cached_property
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from bot.command_base import CommandBase
+from bot.locks import locks
 from bot.herbs import HerbCommandHandler
 from bot.hunt import HuntCommandHandler
 from bot.inventory import InventoryCommandHandler
 from bot.pile import PileCommandHandler
-from db.characters import DbCharacterUser
-from db.players import DbPlayerConfig
+from db.characters import AsyncDbCharacterConfig, AsyncDbCharacterUser
+from db.permissions import permission_cache
+from db.players import AsyncDbPlayerConfig
 from exceptions import BannedException, WrongChatError
 from logs.logs import main_logger, user_logger
 
@@ -25,20 +29,43 @@ class CommonCommandHandler(CommandBase):
 
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.player_db = DbPlayerConfig()
-        self.hunt_db = HuntCommandHandler(update, context)
-        self.herb_db = HerbCommandHandler(update, context)
-        self.inventory_db = InventoryCommandHandler(update, context)
-        self.character_user_db = DbCharacterUser(update.message.from_user.id)
-        self.pile_db = PileCommandHandler(update, context)
+
+    # Helpers are built on first use, so a command only pays for the ones it calls.
+    @cached_property
+    def player_db(self) -> AsyncDbPlayerConfig:
+        return AsyncDbPlayerConfig()
+
+    @cached_property
+    def hunt_db(self) -> HuntCommandHandler:
+        return HuntCommandHandler(self.update, self.context)
+
+    @cached_property
+    def herb_db(self) -> HerbCommandHandler:
+        return HerbCommandHandler(self.update, self.context)
+
+    @cached_property
+    def inventory_db(self) -> InventoryCommandHandler:
+        return InventoryCommandHandler(self.update, self.context)
+
+    @cached_property
+    def character_user_db(self) -> AsyncDbCharacterUser:
+        return AsyncDbCharacterUser(self.user.id)
+
+    @cached_property
+    def character_db(self) -> AsyncDbCharacterConfig:
+        return AsyncDbCharacterConfig()
+
+    @cached_property
+    def pile_db(self) -> PileCommandHandler:
+        return PileCommandHandler(self.update, self.context)
 
     async def __aenter__(self):
         main_logger.debug(
             f"Common command manager starting with command: {self.command}"
         )
-        player = self.player_db.get_player_by_id(self.user.id)
+        player = await permission_cache.as_get(self.user.id)
         if not player:
-            self.player_db.add_player(
+            player = await self.player_db.add_player(
                 self.user.id,
                 self.user.username,  # type: ignore
                 self.user.first_name,
@@ -75,7 +102,7 @@ class CommonCommandHandler(CommandBase):
                 "view_single_char [Имя персонажа] - просмотреть состояние персонажа с указанным именем",
             ]
         )
-        if self.player_db.check_if_user_is_admin(self.user.id):
+        if await self.player_db.check_if_user_is_admin(self.user.id):
             commands = "\n".join(
                 [
                     commands,
@@ -117,7 +144,7 @@ class CommonCommandHandler(CommandBase):
 
     async def hunt(self):
         name = self.text.split("\n")[0].strip().capitalize()
-        if not self.character_user_db.get_one_own_char(name):
+        if not (char := await self.character_user_db.get_one_own_char(name)):
             await self.bot.send_message(
                 self.chat_id,
                 self.char_404_msg,
@@ -125,17 +152,18 @@ class CommonCommandHandler(CommandBase):
             )
             user_logger.info(f'Охота чужим персонажем {self.update.message.from_user.id}')
             return None
-        await self.hunt_db.hunt()
+        async with locks.hold(("character", char.no)):
+            await self.hunt_db.hunt()
 
     async def hunt_help(self):
         await self.hunt_db.hunt_help()
 
     async def view_own_chars(self):
-        chars = self.character_user_db.get_all_own_chars()
-        await self.view_list_from_db(chars)
+        chars = await self.character_user_db.get_all_own_chars()
+        await self.view_list_from_db(await self.character_db.render_chars(chars))
 
     async def view_single_char(self):
-        char = self.character_user_db.get_one_own_char(self.text)
+        char = await self.character_user_db.get_one_own_char(self.text)
         if not char:
             await self.bot.send_message(
                 self.chat_id,
@@ -143,7 +171,8 @@ class CommonCommandHandler(CommandBase):
                 reply_to_message_id=self.update.message.id,
             )
         else:
-            await self.bot.send_message(self.chat_id, str(char))
+            card = (await self.character_db.render_chars([char]))[0]
+            await self.bot.send_message(self.chat_id, card)
 
     async def gather(self):
         return
@@ -5,3 +5,5 @@ CARRY_PREY = "carry_prey"
 
 VIEW_INVENTORY = "view_inv"
 CLEAR_INVENTORY = "clear_inv"
+
+TURN_PAGE = "page"
@@ -1,95 +1,83 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from bot.buttons import (get_single_inv_keyboard,
+from bot.buttons import (get_page_keyboard,
+                         get_single_inv_keyboard,
                          get_view_inv_keyboard,
                          get_pile_prey_keyboard)
 from bot.command_base import CallbackBase
-from db.characters import DbCharacterConfig
-from db.eat import Eater
-from db.inventory import InventoryManager
-from db.pile import PreyPileConfig
-from db.prey import DbPreyConfig
+from bot.state import StateName, clear_state, get_state, set_state
+from db.characters import AsyncDbCharacterConfig
+from db.eat import AsyncEater
+from db.inventory import AsyncInventoryManager
+from db.pile import AsyncPreyPileConfig
+from db.prey import AsyncDbPreyConfig
 
 
 class HuntConversation(CallbackBase):
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.char_db = DbCharacterConfig()
-        self.inventory_db = InventoryManager()
-        self.nom = Eater()
+        self.char_db = AsyncDbCharacterConfig()
+        self.inventory_db = AsyncInventoryManager()
+        self.prey_db = AsyncDbPreyConfig()
+        self.nom = AsyncEater()
 
     async def action(self):
-        prey = self.context.user_data["state"]["args"]["prey"]
-        char = self.char_db.get_char_by_name(
-            self.context.user_data["state"]["args"]["cat"]
-        )
+        state = get_state(self.context)
+        prey = await self.prey_db.get_prey_by_no(state.prey_no)
+        char = await self.char_db.get_char_by_no(state.char_no)
         match self.query_data:
             case "take_prey":
-                res = self.inventory_db.add_item(
+                res = await self.inventory_db.add_item(
                     char_no=char.no, type="prey", item_id=prey.no
                 )
                 await self.context.bot.send_message(self.chat_id, res)
             case "leave_prey":
                 await self.bot.send_message(self.chat_id, "Вы оставили добычу.")
             case "eat_prey":
-                res = self.nom.eat(char, prey)
+                res = await self.nom.eat(char, prey)
                 await self.context.bot.send_message(self.chat_id, res)
-        del self.context.user_data["state"]
+        clear_state(self.context)
 
 
 class InvBaseConv(CallbackBase):
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.char_db = DbCharacterConfig()
-        self.inventory_db = InventoryManager()
+        self.char_db = AsyncDbCharacterConfig()
+        self.inventory_db = AsyncInventoryManager()
 
     async def action(self):
-        char = self.char_db.get_char_by_name(
-            self.context.user_data["state"]["args"]["cat"]
-        )
+        char = await self.char_db.get_char_by_no(get_state(self.context).char_no)
         match self.query_data:
             case "view_inv":
-                if not self.inventory_db.get_char_inventory(char.no):
+                inv = await self.inventory_db.get_inventory_view(char.no)
+                if not inv:
                     await self.bot.send_message(self.chat_id, f"Инвентарь персонажа {char.name} пуст")
                     return
-                self.context.user_data.update(
-                    {
-                        "state": {
-                            "name": "inv_view",
-                            "args": {"cat": char},
-                        }
-                    }
-                )
+                set_state(self.context, StateName.INV_VIEW, char_no=char.no)
                 await self.bot.send_message(
                     self.chat_id,
                     f"Инвентарь персонажа {char.name}",
-                    reply_markup=get_view_inv_keyboard(char.no),
+                    reply_markup=get_view_inv_keyboard(inv),
                 )
             case "clear_inv":
-                self.inventory_db.clear_inventory(char.no)
+                await self.inventory_db.clear_inventory(char.no)
                 await self.bot.send_message(self.chat_id, "Инвентарь очищен!")
 
 
 class InvViewConv(CallbackBase):
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.prey_db = DbPreyConfig()
+        self.prey_db = AsyncDbPreyConfig()
+        self.char_db = AsyncDbCharacterConfig()
 
     async def action(self):
-        char = self.context.user_data["state"]["args"]["cat"]
+        char = await self.char_db.get_char_by_no(get_state(self.context).char_no)
         clan_cat = char.clan_no is not None
         if "Дичь:" in self.query_data:
-            prey = self.prey_db.get_prey_by_no(self.query_data.replace("Дичь:", ""))
+            prey = await self.prey_db.get_prey_by_no(self.query_data.replace("Дичь:", ""))
             text = f"Дичь:\n{prey}\n\nЧто бы вы хотели сделать?"
-            self.context.user_data.update(
-                {
-                    "state": {
-                        "name": "prey_view",
-                        "args": {"prey": prey, "cat": char.name},
-                    }
-                }
-            )
+            set_state(self.context, StateName.PREY_VIEW, char_no=char.no, prey_no=prey.no)
             await self.bot.send_message(
                 self.chat_id, text, reply_markup=get_single_inv_keyboard(clan_cat)
             )
@@ -98,44 +86,43 @@ class InvViewConv(CallbackBase):
 class PreyViewConv(CallbackBase):
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.prey_db = DbPreyConfig()
-        self.nom = Eater()
-        self.pile = PreyPileConfig()
-        self.inv = InventoryManager()
-        self.char_db = DbCharacterConfig()
+        self.prey_db = AsyncDbPreyConfig()
+        self.nom = AsyncEater()
+        self.pile = AsyncPreyPileConfig()
+        self.inv = AsyncInventoryManager()
+        self.char_db = AsyncDbCharacterConfig()
     
     async def action(self):
-        prey = self.context.user_data["state"]["args"]["prey"]
-        char = self.char_db.get_char_by_name(
-            self.context.user_data["state"]["args"]["cat"]
-        )
+        state = get_state(self.context)
+        prey = await self.prey_db.get_prey_by_no(state.prey_no)
+        char = await self.char_db.get_char_by_no(state.char_no)
         match self.query_data:
             case "carry_prey":
-                res = self.pile.add_to_pile(char.clan_no, prey)
-                self.inv.remove_item(char.no, prey.no)
+                res = await self.pile.add_to_pile(char.clan_no, prey)
+                await self.inv.remove_item(char.no, prey.no)
                 await self.context.bot.send_message(self.chat_id, res)
             case "leave_prey":
-                self.inv.remove_item(char.no, prey.no)
+                await self.inv.remove_item(char.no, prey.no)
                 await self.bot.send_message(self.chat_id, "Вы оставили добычу.")
             case "eat_prey":
-                res = self.nom.eat(char, prey)
-                self.inv.remove_item(char.no, prey.no)
+                res = await self.nom.eat(char, prey)
+                await self.inv.remove_item(char.no, prey.no)
                 await self.context.bot.send_message(self.chat_id, res)
-        del self.context.user_data["state"]
+        clear_state(self.context)
 
 
 class PileConv(CallbackBase):
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.prey_db = DbPreyConfig()
-        self.nom = Eater()
-        self.pile = PreyPileConfig()
-        self.inv = InventoryManager()
+        self.prey_db = AsyncDbPreyConfig()
+        self.nom = AsyncEater()
+        self.pile = AsyncPreyPileConfig()
+        self.inv = AsyncInventoryManager()
+        self.char_db = AsyncDbCharacterConfig()
 
     async def pile_view(self):
-        prey = self.prey_db.get_prey_by_no(int(self.query_data))
-        self.context.user_data["state"]["name"] = "pile_prey"
-        self.context.user_data["state"]["args"]["prey"] = prey
+        prey = await self.prey_db.get_prey_by_no(int(self.query_data))
+        set_state(self.context, StateName.PILE_PREY, char_no=get_state(self.context).char_no, prey_no=prey.no)
         await self.bot.send_message(
             self.chat_id,
             "Что бы вы хотели сделать?",
@@ -143,16 +130,29 @@ class PileConv(CallbackBase):
         )
 
     async def pile_prey(self):
-        prey = self.context.user_data["state"]["args"]["prey"]
-        char = self.context.user_data["state"]["args"]["cat"]
+        state = get_state(self.context)
+        prey = await self.prey_db.get_prey_by_no(state.prey_no)
+        char = await self.char_db.get_char_by_no(state.char_no)
         match self.query_data:
             case "leave":
                 return
             case "eat":
-                self.pile.get_from_pile(char.clan_no, prey)
-                await self.bot.send_message(self.chat_id, self.nom.eat(char, prey))
+                await self.pile.get_from_pile(char.clan_no, prey)
+                await self.bot.send_message(self.chat_id, await self.nom.eat(char, prey))
             case "take":
                 await self.bot.send_message(
-                    self.chat_id, self.inv.add_item(char.no, "prey", prey.no)
+                    self.chat_id, await self.inv.add_item(char.no, "prey", prey.no)
                 )
-        del self.context.user_data["state"]
+        clear_state(self.context)
+
+
+class PageConv(CallbackBase):
+    async def turn_page(self):
+        _, list_id, page = self.query_data.split(":")
+        pages = self.context.chat_data.get("pages", {}).get(list_id)
+        if not pages:
+            await self.query.edit_message_reply_markup(None)
+            await self.bot.send_message(self.chat_id, "Список устарел, запросите его заново.")
+            return
+        page = int(page)
+        await self.query.edit_message_text(pages[page], reply_markup=get_page_keyboard(list_id, page, len(pages)))
@@ -1,9 +1,12 @@
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from bot.command_base import CommandBase
+from db import UnitOfWork
 from db.herbs import HerbUser
-from exceptions import CharacterDeadException, CharacterFrozenException
+from exceptions import CharacterDeadException, CharacterFrozenException, TooMuchGatheringError
 from logs.logs import main_logger
 from utils import capitalize_for_db
 
@@ -18,9 +21,13 @@ class HerbCommandHandler(CommandBase):
             main_logger.debug(
                 f"Начало собирательства для {self.user.username} {params}"
             )
-            herb, success = HerbUser(
-                params[0], (params[1] if len(params) > 1 else None)
-            ).gather()
+            # Runs in a worker thread, waiting for the SQLite write lock must not block the event loop.
+            herb, success = await asyncio.to_thread(
+                lambda: HerbUser(params[0], (params[1] if len(params) > 1 else None)).gather()
+            )
+            # The attempt is taken, the replies below must not hold the SQLite write lock.
+            if uow := UnitOfWork.current():
+                await uow.checkpoint()
         except CharacterDeadException:
             await self.context.bot.send_message(self.chat_id, "Этот персонаж мертв!")
             main_logger.info(
@@ -33,6 +40,8 @@ class HerbCommandHandler(CommandBase):
             main_logger.info(
                 f"Собирательство с замороженным персонажем: {self.user.username}"
             )
+        except TooMuchGatheringError:
+            await self.bot.send_message(self.chat_id, "Этот персонаж уже достаточно трав собрал в этом сезоне!")
         except Exception as err:
             main_logger.error(err)
         else:
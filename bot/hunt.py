@@ -5,7 +5,8 @@ from telegram.ext import ContextTypes
 
 from bot.buttons import get_hunt_keyboard
 from bot.command_base import CommandBase
-from db.hunt import Hunt
+from bot.state import StateName, set_state
+from db.hunt import AsyncHunt
 from exceptions import (CharacterDeadException, CharacterFrozenException,
                         NoItemFoundDbError, TooMuchHuntingError)
 from logs.logs import main_logger
@@ -23,9 +24,8 @@ class HuntCommandHandler(CommandBase):
             return
         try:
             main_logger.debug(f"Начало охоты для {self.user.username} {params}")
-            prey, success = Hunt(
-                params[0], params[1]
-            ).hunt()
+            hunt = AsyncHunt(params[0], params[1])
+            prey, success = await hunt.hunt()
         except CharacterDeadException:
             await self.context.bot.send_message(self.chat_id, "Этот персонаж мертв!")
             main_logger.info(f"Охота с мертвым персонажем: {self.user.username}")
@@ -48,14 +48,7 @@ class HuntCommandHandler(CommandBase):
                 await self.context.bot.send_message(
                     self.chat_id, f"Охота на {prey.name} успешна!"
                 )
-                self.context.user_data.update(
-                    {
-                        "state": {
-                            "name": "hunt_completed",
-                            "args": {"prey": prey, "cat": params[0]},
-                        }
-                    }
-                )  # type: ignore
+                set_state(self.context, StateName.HUNT_COMPLETED, char_no=hunt.char.no, prey_no=prey.no)
                 await self.context.bot.send_message(
                     self.chat_id,
                     text=f"Охота успешна! Добыча: {prey.name}\n"
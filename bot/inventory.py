@@ -3,8 +3,9 @@ from telegram.ext import ContextTypes, ConversationHandler
 
 from bot.buttons import get_base_inv_keyboard
 from bot.command_base import CommandBase
-from db.characters import DbCharacterConfig
-from db.inventory import InventoryManager
+from bot.state import StateName, set_state
+from db.characters import AsyncDbCharacterConfig
+from db.inventory import AsyncInventoryManager
 from exceptions import CharacterDeadException, CharacterFrozenException
 from logs.logs import main_logger
 from utils import capitalize_for_db
@@ -13,11 +14,11 @@ from utils import capitalize_for_db
 class InventoryCommandHandler(CommandBase):
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.inventory_db = InventoryManager()
-        self.character_db = DbCharacterConfig()
+        self.inventory_db = AsyncInventoryManager()
+        self.character_db = AsyncDbCharacterConfig()
 
     async def send_inventory_message(self):
-        char = self.character_db.get_char_by_name(self.text.capitalize())
+        char = await self.character_db.get_char_by_name(self.text.capitalize())
         if not char:
             await self.bot.send_message(self.chat_id, "Персонаж с таким именем не найден")
             return
@@ -34,14 +35,7 @@ class InventoryCommandHandler(CommandBase):
                 self.chat_id, "Этот персонаж мертв!"
             )    
         else:
-            self.context.user_data.update(
-                {
-                    "state": {
-                        "name": "inv_base",
-                        "args": {"cat": self.text},
-                    }
-                }
-            )
+            set_state(self.context, StateName.INV_BASE, char_no=char.no)
             await self.bot.send_message(
                 self.chat_id,
                 "Что бы вы хотели сделать?",
@@ -0,0 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable
+
+from db import UnitOfWork
+
+
+class LockManager:
+    """
+    asyncio locks created on demand by key, e.g. ("user", chat_id) or ("character", no).
+
+    A lock is dropped once nobody holds or waits for it, so the table only grows with the
+    number of updates being processed at the moment.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._users: dict[Hashable, int] = {}
+
+    def _get(self, key: Hashable) -> asyncio.Lock:
+        self._users[key] = self._users.get(key, 0) + 1
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def _put(self, key: Hashable) -> None:
+        self._users[key] -= 1
+        if not self._users[key]:
+            del self._users[key]
+            del self._locks[key]
+
+    @asynccontextmanager
+    async def hold(self, *keys: Hashable) -> AsyncIterator[None]:
+        """
+        Holds every key until the block ends.
+
+        Keys are taken in a fixed order, so two holders of overlapping keys cannot deadlock.
+        Open the unit of work outside the block, ``async with UnitOfWork(), locks.hold(...)``:
+        if the block succeeds its work is committed before the locks are released, so the
+        next holder sees it. A failed block releases the locks and the unit of work rolls back.
+        """
+        keys = tuple(sorted(set(keys), key=repr))
+        locks = [self._get(key) for key in keys]
+        acquired: list[asyncio.Lock] = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+            if uow := UnitOfWork.current():
+                await uow.checkpoint()
+        finally:
+            for lock in acquired:
+                lock.release()
+            for key in keys:
+                self._put(key)
+
+
+locks = LockManager()
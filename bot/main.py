@@ -3,16 +3,27 @@ import os
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import (Application, CallbackQueryHandler, ContextTypes,
-                          MessageHandler, filters)
+                          MessageHandler, PersistenceInput, PicklePersistence,
+                          filters)
 
 from bot.commands import CallbackRouter, CommandRouter, ConversationRouter
 from bot.errors import ErrorHandler
+from bot.locks import locks
+from bot.notifications import notifications
+from db import UnitOfWork
+from schedule import create_schedules, scheduler
 
 load_dotenv()
 
 
+def user_keys(update: Update) -> tuple:
+    """Updates of one user are processed one at a time, different users run in parallel."""
+    return (("user", update.effective_user.id),) if update.effective_user else ()
+
+
 async def command_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await CommandRouter(update, context).route()
+    async with UnitOfWork(), locks.hold(*user_keys(update)):
+        await CommandRouter(update, context).route()
 
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
@@ -20,15 +31,41 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def conversation_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await ConversationRouter(update, context).route()
+    async with UnitOfWork(), locks.hold(*user_keys(update)):
+        await ConversationRouter(update, context).route()
 
 
 async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await CallbackRouter(update, context).route()
+    async with UnitOfWork(), locks.hold(*user_keys(update)):
+        await CallbackRouter(update, context).route()
+
+
+async def post_init(app: Application):
+    notifications.start(app.bot)
+    create_schedules()
+    print("Jobs scheduled!")
+
+
+async def post_shutdown(app: Application):
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    await notifications.stop()
 
 
 def bot_main(token: str):
-    app = Application.builder().token(token).build()
+    builder = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(True)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    # Keeps conversation states and list pages across restarts.
+    if state_file := os.getenv("STATE_FILE"):
+        builder.persistence(
+            PicklePersistence(state_file, store_data=PersistenceInput(bot_data=False, callback_data=False))
+        )
+    app = builder.build()
     app.add_handler(MessageHandler(filters.COMMAND, command_handler))
     app.add_handler(MessageHandler(filters.TEXT, conversation_handler))
     app.add_handler(CallbackQueryHandler(callback_handler))
@@ -0,0 +1,149 @@
+import asyncio
+from collections import deque
+from time import monotonic
+
+from telegram import Bot
+from telegram.error import RetryAfter, TelegramError
+
+from logs.logs import schedule_logger as logger
+
+
+MESSAGE_LIMIT = 4096
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+
+
+class TokenBucket:
+    """
+    Allows rate sends per second on average and bursts of up to capacity sends.
+
+    :var float rate: tokens added per second
+    :var float capacity: maximum tokens kept
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hands out no tokens for the next seconds."""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class Digest:
+    """
+    Lines collected during one job run and sent to a chat as a single message.
+
+    :var int|str|None chat_id: chat the digest goes to, nothing is sent if empty
+    :var str title: first line of the message
+    """
+
+    def __init__(self, queue: "NotificationQueue", chat_id: int | str | None, title: str) -> None:
+        self.queue = queue
+        self.chat_id = chat_id
+        self.title = title
+        self.lines: list[str] = []
+
+    def add(self, line: str) -> None:
+        self.lines.append(line)
+
+    def send(self) -> None:
+        if not self.lines:
+            return
+        if not self.chat_id:
+            logger.warning(f"No chat for digest '{self.title}', {len(self.lines)} lines dropped")
+            return
+        message = [self.title]
+        size = len(self.title)
+        for line in self.lines:
+            if size + 1 + len(line) > MESSAGE_LIMIT:
+                self.queue.send(self.chat_id, "\n".join(message))
+                message, size = [], -1
+            message.append(line)
+            size += 1 + len(line)
+        self.queue.send(self.chat_id, "\n".join(message))
+        self.lines = []
+
+
+class NotificationQueue:
+    """
+    Outgoing messages sent in the background within Telegram flood limits.
+
+    Every chat has its own queue drained by its own task, so a slow chat does not hold back
+    the others, and all chats share the global limit. On RetryAfter only that chat waits, the
+    message is retried once the wait is over.
+    """
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, chat_rate: float = CHAT_RATE) -> None:
+        self.chat_rate = chat_rate
+        self.bot: Bot | None = None
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: dict[int | str, TokenBucket] = {}
+        self._queues: dict[int | str, deque[str]] = {}
+        self._workers: dict[int | str, asyncio.Task] = {}
+
+    def start(self, bot: Bot) -> None:
+        self.bot = bot
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Gives queued messages up to timeout seconds to go out, then drops the rest."""
+        workers = list(self._workers.values())
+        if not workers:
+            return
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Notification queue stopped, {self.pending} messages dropped")
+
+    @property
+    def pending(self) -> int:
+        return sum(map(len, self._queues.values()))
+
+    def send(self, chat_id: int | str, text: str) -> None:
+        """Queues the message and returns at once, must be called on the bot's event loop."""
+        self._queues.setdefault(chat_id, deque()).append(text)
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._drain(chat_id))
+
+    def digest(self, chat_id: int | str | None, title: str) -> Digest:
+        return Digest(self, chat_id, title)
+
+    async def _drain(self, chat_id: int | str) -> None:
+        bucket = self._chats.setdefault(chat_id, TokenBucket(self.chat_rate, 1))
+        queue = self._queues[chat_id]
+        try:
+            while queue:
+                await bucket.acquire()
+                await self._global.acquire()
+                try:
+                    await self.bot.send_message(chat_id, queue[0])  # type: ignore
+                except RetryAfter as err:
+                    logger.warning(f"Flood control for chat {chat_id}, retry in {err.retry_after}s")
+                    bucket.pause(err.retry_after)
+                    continue
+                except TelegramError as err:
+                    logger.error(f"Notification to {chat_id} failed: {err}")
+                queue.popleft()
+        finally:
+            del self._workers[chat_id]
+            if not queue:
+                del self._queues[chat_id]
+
+
+notifications = NotificationQueue()
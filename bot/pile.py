@@ -3,18 +3,19 @@ from telegram.ext import ContextTypes
 
 from bot.buttons import get_pile_keyboard
 from bot.command_base import CommandBase
-from db.characters import DbCharacterConfig
-from db.pile import PreyPileConfig
+from bot.state import StateName, set_state
+from db.characters import AsyncDbCharacterConfig
+from db.pile import AsyncPreyPileConfig
 
 
 class PileCommandHandler(CommandBase):
     def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         super().__init__(update, context)
-        self.char_db = DbCharacterConfig()
-        self.pile_db = PreyPileConfig()
+        self.char_db = AsyncDbCharacterConfig()
+        self.pile_db = AsyncPreyPileConfig()
     
     async def send_pile_message(self):
-        char = self.char_db.get_char_by_name(self.text.capitalize())
+        char = await self.char_db.get_char_by_name(self.text.capitalize())
         if not char:
             await self.bot.send_message(self.chat_id, "Персонаж с таким именем не найден")
         elif char.player_chat_id != self.user.id:
@@ -34,15 +35,8 @@ class PileCommandHandler(CommandBase):
                 self.chat_id, "Этот персонаж не принадлежит ни одному клану!"
             )    
         else:
-            self.context.user_data.update(
-                {
-                    "state": {
-                        "name": "pile_view",
-                        "args": {"cat": char},
-                    }
-                }
-            )
-            prey = self.pile_db.get_prey_for_clan(char.clan_no)
+            set_state(self.context, StateName.PILE_VIEW, char_no=char.no)
+            prey = await self.pile_db.get_prey_for_clan(char.clan_no)
             await self.bot.send_message(
                 self.chat_id,
                 "Список дичи в вашем клане:",
@@ -0,0 +1,96 @@
+from enum import StrEnum
+from os import getenv
+from time import time
+
+from telegram.ext import Application, ContextTypes
+
+
+STATE_TTL = int(getenv("STATE_TTL", 1800))
+
+
+class StateName(StrEnum):
+    HUNT_COMPLETED = "hunt_completed"
+    INV_BASE = "inv_base"
+    INV_VIEW = "inv_view"
+    PREY_VIEW = "prey_view"
+    PILE_VIEW = "pile_view"
+    PILE_PREY = "pile_prey"
+    SETTINGS = "settings"
+
+
+class ConversationState:
+    """
+    Conversation step of one user, kept in user_data["state"].
+
+    Only ids are stored, handlers load the rows again, so the state never holds stale objects
+    and pickles in a few bytes.
+
+    :var StateName name: current step
+    :var int|None char_no: characters.no of the acting character
+    :var int|None prey_no: prey.no of the chosen prey
+    :var str|None action: step of the settings conversation
+    :var str|None job_id: job chosen in the settings conversation
+    :var float updated: unix time the state was last set
+    """
+
+    def __init__(
+        self,
+        name: StateName,
+        char_no: int | None = None,
+        prey_no: int | None = None,
+        action: str | None = None,
+        job_id: str | None = None,
+    ) -> None:
+        self.name = name
+        self.char_no = char_no
+        self.prey_no = prey_no
+        self.action = action
+        self.job_id = job_id
+        self.updated = time()
+
+    @property
+    def expired(self) -> bool:
+        return time() - self.updated > STATE_TTL
+
+    def __repr__(self) -> str:
+        return (
+            f"ConversationState({self.name}, char_no={self.char_no}, prey_no={self.prey_no}, "
+            f"action={self.action}, job_id={self.job_id})"
+        )
+
+
+_last_sweep = 0.0
+
+
+def _sweep(application: Application) -> None:
+    """Drops expired states of every user, at most once per STATE_TTL."""
+    global _last_sweep
+    if time() - _last_sweep < STATE_TTL:
+        return
+    _last_sweep = time()
+    for user_data in application.user_data.values():
+        state = user_data.get("state")
+        if isinstance(state, ConversationState) and state.expired:
+            del user_data["state"]
+
+
+def set_state(context: ContextTypes.DEFAULT_TYPE, name: StateName, **ids) -> ConversationState:
+    state = ConversationState(name, **ids)
+    context.user_data["state"] = state  # type: ignore
+    _sweep(context.application)
+    return state
+
+
+def get_state(context: ContextTypes.DEFAULT_TYPE) -> ConversationState | None:
+    """Current state of the user, expired or malformed states are dropped."""
+    state = context.user_data.get("state")  # type: ignore
+    if state is None:
+        return None
+    if not isinstance(state, ConversationState) or state.expired:
+        del context.user_data["state"]  # type: ignore
+        return None
+    return state
+
+
+def clear_state(context: ContextTypes.DEFAULT_TYPE) -> None:
+    context.user_data.pop("state", None)  # type: ignore
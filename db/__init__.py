@@ -1,21 +1,216 @@
 from __future__ import annotations
 
+import os
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar, Token
 from datetime import datetime
-from typing import Any, ClassVar
+from itertools import chain
+from threading import Lock
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator
 
 from pydantic import computed_field, field_validator
+from sqlalchemy import Connection, Delete, Update, event, insert, inspect
 from sqlalchemy.ext.asyncio.engine import create_async_engine
-from sqlmodel import (CheckConstraint, Column, Field, Integer,
-                      Session, SQLModel, UniqueConstraint, and_, create_engine,
-                      select)
+from sqlalchemy.pool import NullPool
+from sqlmodel import (CheckConstraint, Column, Field, Index, Integer,
+                      Session, SQLModel, UniqueConstraint, create_engine, delete,
+                      and_, func, select, text, union_all)
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.sql.expression import SelectOfScalar
 from db.table_data import AGES, CLANS, SEASONS, SETTINGS
+from exceptions import MixedSessionWriteError
 from logs.logs import main_logger as logger
 
 engine = create_engine("sqlite:///cats.db")
 as_engine = create_async_engine("sqlite+aiosqlite:///cats.db")
 
+# Pragmas applied to every new connection, selected with the SQLITE_PROFILE env var.
+SQLITE_PROFILES: dict[str, dict[str, str | int]] = {
+    "default": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -16000,
+        "mmap_size": 67108864,
+        "temp_store": "MEMORY",
+    },
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 10000,
+    },
+    "minimal": {
+        "busy_timeout": 5000,
+    },
+}
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(as_engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    name = os.getenv("SQLITE_PROFILE", "default")
+    if name not in SQLITE_PROFILES:
+        logger.warning(f"Unknown SQLITE_PROFILE {name}, using default")
+        name = "default"
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PROFILES[name].items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+
+@event.listens_for(engine, "savepoint")
+@event.listens_for(as_engine.sync_engine, "savepoint")
+def _begin_before_savepoint(conn, name) -> None:
+    # pysqlite only opens a transaction before DML. A SAVEPOINT issued first would start one of its
+    # own, and releasing it would commit everything, so the transaction is opened explicitly.
+    dbapi_connection = conn.connection.dbapi_connection
+    if not getattr(dbapi_connection, "_connection", dbapi_connection).in_transaction:
+        conn.exec_driver_sql("BEGIN")
+
+
+class DbSession(Session):
+    """Session of the bot database, it keeps CharacterStatModifiers in step with its writes."""
+
+
+class DbAsyncSession(AsyncSession):
+    """Async counterpart of DbSession."""
+
+    sync_session_class = DbSession
+
+
+class UnitOfWorkSession(DbSession):
+    """
+    Session shared by every repository inside one UnitOfWork.
+
+    commit only flushes and leaving a ``with`` block does not close the
+    session: the owning UnitOfWork commits and closes it once at the end.
+    """
+
+    def commit(self) -> None:
+        self.flush()
+
+    def __exit__(self, *args) -> None:
+        return None
+
+
+class UnitOfWorkAsyncSession(DbAsyncSession):
+    """Async counterpart of UnitOfWorkSession."""
+
+    sync_session_class = UnitOfWorkSession
+
+    async def __aexit__(self, *args) -> None:
+        return None
+
+
+class UnitOfWork:
+    """
+    Single database session for all the work done while handling one update.
+
+    DbBrowser instances created inside ``with UnitOfWork():`` share its
+    session, ``async with`` additionally commits the shared async session.
+    Everything is committed once on exit, or rolled back if the block raised
+    or a flush failed. The two sessions use separate SQLite connections, so
+    while one of them holds uncommitted writes the other may only read: its
+    write would wait for the lock held by the same update and fail after
+    busy_timeout. Such a write raises MixedSessionWriteError at once.
+
+    checkpoint() commits early at explicit points, e.g. right after a hunt takes
+    its attempt, where holding the SQLite write lock until the end would make
+    other updates wait on this one's Telegram replies.
+
+    :var int sessions_opened: sessions opened while the unit of work was active
+    """
+
+    def __init__(self) -> None:
+        self.session: UnitOfWorkSession | None = None
+        self.async_session: UnitOfWorkAsyncSession | None = None
+        self.sessions_opened = 0
+        self._token: Token | None = None
+
+    def __enter__(self) -> UnitOfWork:
+        self._token = _unit_of_work.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        _unit_of_work.reset(self._token)
+        logger.debug(f"Unit of work finished, sessions opened: {self.sessions_opened}")
+        if self.session is None:
+            return
+        try:
+            if exc_type is None and self.session.is_active:
+                Session.commit(self.session)
+            else:
+                self.session.rollback()
+        finally:
+            self.session.close()
+
+    async def __aenter__(self) -> UnitOfWork:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if self.async_session is not None:
+                try:
+                    if exc_type is None and self.async_session.sync_session.is_active:
+                        await self.async_session.run_sync(Session.commit)
+                    else:
+                        await self.async_session.rollback()
+                finally:
+                    await self.async_session.close()
+        finally:
+            self.__exit__(exc_type, exc_value, traceback)
+
+    @staticmethod
+    def current() -> UnitOfWork | None:
+        return _unit_of_work.get()
+
+    async def checkpoint(self) -> None:
+        """Commit everything done so far, both sessions stay open for further work."""
+        if self.async_session is not None and self.async_session.sync_session.is_active:
+            await self.async_session.run_sync(Session.commit)
+        if self.session is not None and self.session.is_active:
+            Session.commit(self.session)
+
+    def get_session(self) -> UnitOfWorkSession:
+        if self.session is None:
+            self.session = UnitOfWorkSession(engine, expire_on_commit=False, info={"unit_of_work": self})
+            self.sessions_opened += 1
+        return self.session
+
+    def get_async_session(self) -> UnitOfWorkAsyncSession:
+        if self.async_session is None:
+            self.async_session = UnitOfWorkAsyncSession(
+                as_engine, expire_on_commit=False, info={"unit_of_work": self}
+            )
+            self.sessions_opened += 1
+        return self.async_session
+
+    def writing(self, session: Session) -> None:
+        """Marks session as holding uncommitted writes, fails if the other session already does."""
+        sessions = (self.session, self.async_session.sync_session if self.async_session else None)
+        if any(other is not None and other is not session and other.info.get("writes") for other in sessions):
+            raise MixedSessionWriteError(
+                "Unit of work writes through both sessions, commit with checkpoint() before switching"
+            )
+        session.info["writes"] = True
+
+
+_unit_of_work: ContextVar[UnitOfWork | None] = ContextVar("unit_of_work", default=None)
+
+
+def open_session(**kwargs) -> DbSession:
+    """Session of the current unit of work, or a new standalone one outside of it."""
+    if uow := _unit_of_work.get():
+        return uow.get_session()
+    return DbSession(engine, **kwargs)
+
+
+def open_async_session() -> DbAsyncSession:
+    """Async session of the current unit of work, or a new standalone one outside of it."""
+    if uow := _unit_of_work.get():
+        return uow.get_async_session()
+    return DbAsyncSession(as_engine, expire_on_commit=False)
+
 
 class Buffs(SQLModel, table=True):
     """
@@ -38,7 +233,7 @@ class BuffsStats(SQLModel, table=True):
     """
 
     no: int | None = Field(primary_key=True, default=None)
-    buff: int = Field(foreign_key="buffs.no", ondelete="CASCADE")
+    buff: int = Field(foreign_key="buffs.no", ondelete="CASCADE", index=True)
     stat: str
     increase: int = Field(sa_column=Column(Integer))
     __table_args__ = (CheckConstraint(increase.sa_column > 0),)
@@ -70,7 +265,7 @@ class CharacterBuffs(SQLModel, table=True):
     __table_args__ = (UniqueConstraint("buff", "character", name="unique_buff"),)
     no: int | None = Field(primary_key=True, default=None)
     buff: int = Field(foreign_key="buffs.no", ondelete="CASCADE")
-    character: int = Field(foreign_key="characters.no", ondelete="CASCADE")
+    character: int = Field(foreign_key="characters.no", ondelete="CASCADE", index=True)
 
 
 class Players(SQLModel, table=True):
@@ -89,7 +284,7 @@ class Players(SQLModel, table=True):
     __table_args__ = (UniqueConstraint("chat_id", name="player_chatid_unique"),)
     no: int | None = Field(primary_key=True, default=None, index=True)
     chat_id: int
-    username: str
+    username: str = Field(index=True)
     is_admin: bool = Field(default=False)
     is_superuser: bool = Field(default=False)
     is_banned: bool = Field(default=False)
@@ -156,33 +351,47 @@ class Clans(SQLModel, table=True):
     def prey_pile(self):
         res = 0
         query = select(Prey).join(PreyPile, onclause= PreyPile.prey == Prey.no).where(PreyPile.clan == self.no)
-        with Session(engine) as s:
+        with open_session() as s:
             all_prey = s.exec(query).all()
         for item in all_prey:
             res += item.amount
         return res
 
-    def __str__(self):
-        leader = select(Characters).where(Characters.no == self.leader)
-        prey = (
-            select(Prey).join(PreyTerritory).where(PreyTerritory.territory == self.no)
-        )
-        with Session(engine) as s:
-            leader = s.exec(leader).first()
-            prey = s.exec(prey).all()
+    def render(self, leader: str | None, prey: list[str], pile: int) -> str:
+        """
+        Format the clan card from already resolved related data.
+
+        :param str|None leader: leader name
+        :param list[str] prey: names of prey living on the territory
+        :param int pile: total amount of prey in the pile
+        """
         fields = [
             f"Id: {self.no}",
             f"Тип: {'Клан' if self.is_true_clan else 'Территория'}",
             f"Название: {self.name}",
-            f"Дичь: {', '.join([prey.name for prey in prey])}",
+            f"Дичь: {', '.join(prey)}",
         ]
         if self.is_true_clan:
             fields += [
-                f"Текущee количество запасов: {self.prey_pile()}",
-                f"Лидер: {leader.name if leader else 'отсутствует'}",
+                f"Текущee количество запасов: {pile}",
+                f"Лидер: {leader or 'отсутствует'}",
             ]
         return "\n".join(fields)
 
+    def __str__(self):
+        leader = select(Characters).where(Characters.no == self.leader)
+        prey = (
+            select(Prey).join(PreyTerritory).where(PreyTerritory.territory == self.no)
+        )
+        with open_session() as s:
+            leader = s.exec(leader).first()
+            prey = s.exec(prey).all()
+        return self.render(
+            leader.name if leader else None,
+            [i.name for i in prey],
+            self.prey_pile() if self.is_true_clan else 0,
+        )
+
 
 class HerbPile(SQLModel, table=True):
     """
@@ -238,48 +447,55 @@ class Herbs(SQLModel, table=True):
     @property
     def clan(self):
         query = select(Clans).where(Clans.no == self.territory)
-        with Session(engine) as s:
+        with open_session() as s:
             clans = s.exec(query).one()
         return clans
 
     @property
     def actual_disease(self):
         query = select(Diseases).where(Diseases.no == self.disease)
-        with Session(engine) as s:
+        with open_session() as s:
             return s.exec(query).one()
 
     @property
     def actual_injury(self):
         query = select(Injuries).where(Injuries.no == self.injury)
-        with Session(engine) as s:
+        with open_session() as s:
             return s.exec(query).one()
 
-    def __str__(self) -> str:
+    def render(self, clan: str | None, disease: str | None, injury: str | None) -> str:
+        """
+        Format the herb card from already resolved related data.
+
+        :param str|None clan: name of the territory the herb grows on
+        :param str|None disease: name of the treated disease
+        :param str|None injury: name of the treated injury
+        """
         if not self.territory:
             terr = "любая"
         elif self.territory == -1:
             terr = "нейтральная"
         else:
-            terr = self.clan.name
-        if not self.disease:
-            disease = "нет"
-        else:
-            disease = self.actual_disease.name
-        if not self.injury:
-            injury = "нет"
-        else:
-            injury = self.actual_injury.name
+            terr = clan
         return "\n".join(
             [
-                f"Id: {self.no}Название: {self.name}",
+                f"Id: {self.no}",
+                f"Название: {self.name}",
                 f"Территория происхождения: {terr}",
                 f"Минимальная редкость: {self.rarity_min}",
                 f"Максимальная редкость: {self.rarity_max}",
-                f"Болезнь: {disease}",
-                f"Трама: {injury}",
+                f"Болезнь: {disease or 'нет'}",
+                f"Трама: {injury or 'нет'}",
             ]
         )
 
+    def __str__(self) -> str:
+        return self.render(
+            self.clan.name if self.territory and self.territory != -1 else None,
+            self.actual_disease.name if self.disease else None,
+            self.actual_injury.name if self.injury else None,
+        )
+
 
 class CharacterInventory(SQLModel, table=True):
     """
@@ -291,7 +507,7 @@ class CharacterInventory(SQLModel, table=True):
     """
 
     no: int | None = Field(primary_key=True, default=None, index=True)
-    char_no: int = Field(foreign_key="characters.no", ondelete="CASCADE")
+    char_no: int = Field(foreign_key="characters.no", ondelete="CASCADE", index=True)
     type: str
     item: int
     
@@ -341,7 +557,7 @@ class CharacterInjury(SQLModel, table=True):
     __table_args__ = (UniqueConstraint("issue", "character", name="unique_injury"),)
     no: int | None = Field(primary_key=True, default=None)
     issue: int = Field(foreign_key="injuries.no", ondelete="CASCADE")
-    character: int = Field(foreign_key="characters.no", ondelete="CASCADE")
+    character: int = Field(foreign_key="characters.no", ondelete="CASCADE", index=True)
 
 
 class InjuryStat(SQLModel, table=True):
@@ -354,7 +570,7 @@ class InjuryStat(SQLModel, table=True):
     """
 
     no: int | None = Field(primary_key=True, default=None)
-    issue: int = Field(foreign_key="injuries.no", ondelete="CASCADE")
+    issue: int = Field(foreign_key="injuries.no", ondelete="CASCADE", index=True)
     stat: str
     penalty: int = Field(sa_column=Column(Integer))
     __table_args__ = (CheckConstraint(penalty.sa_column < 0),)
@@ -390,12 +606,12 @@ class CharacterDisease(SQLModel, table=True):
     __table_args__ = (UniqueConstraint("issue", "character", name="unique_disease"),)
     no: int | None = Field(primary_key=True, default=None)
     issue: int = Field(foreign_key="diseases.no", ondelete="CASCADE")
-    character: int = Field(foreign_key="characters.no", ondelete="CASCADE")
+    character: int = Field(foreign_key="characters.no", ondelete="CASCADE", index=True)
 
 
 class DiseaseStat(SQLModel, table=True):
     no: int | None = Field(primary_key=True, default=None)
-    issue: int = Field(foreign_key="diseases.no", ondelete="CASCADE")
+    issue: int = Field(foreign_key="diseases.no", ondelete="CASCADE", index=True)
     stat: str
     penalty: int = Field(sa_column=Column(Integer))
     __table_args__ = (CheckConstraint(penalty.sa_column < 0),)
@@ -411,21 +627,94 @@ class CharacterDisability(SQLModel, table=True):
     __table_args__ = (UniqueConstraint("issue", "character", name="unique_trauma"),)
     no: int | None = Field(primary_key=True, default=None)
     issue: int = Field(foreign_key="disabilities.no", ondelete="CASCADE")
-    character: int = Field(foreign_key="characters.no", ondelete="CASCADE")
+    character: int = Field(foreign_key="characters.no", ondelete="CASCADE", index=True)
 
 
 class DisabilityStat(SQLModel, table=True):
     no: int | None = Field(primary_key=True, default=None)
-    issue: int = Field(foreign_key="disabilities.no", ondelete="CASCADE")
+    issue: int = Field(foreign_key="disabilities.no", ondelete="CASCADE", index=True)
     stat: str
     penalty: int = Field(sa_column=Column(Integer))
     __table_args__ = (CheckConstraint(penalty.sa_column < 0),)
 
 
+class CharacterStatModifiers(SQLModel, table=True):
+    """
+    Materialized total of buff and penalty deltas per character and stat.
+
+    DbSession keeps it up to date on every flush or bulk statement that
+    touches character buffs, afflictions or their stat tables, see
+    refresh_stat_modifiers. Writes through other sessions need the
+    rebuild command.
+
+    :var int character: foreign key to characters.no
+    :var str stat: stat affected
+    :var int total_delta: sum of all buffs and penalties for the stat
+    """
+
+    character: int = Field(
+        foreign_key="characters.no", ondelete="CASCADE", primary_key=True
+    )
+    stat: str = Field(primary_key=True)
+    total_delta: int
+
+
+# (parent table, stat table, character link table, link column, delta column)
+MODIFIER_SOURCES = (
+    (Buffs, BuffsStats, CharacterBuffs, "buff", "increase"),
+    (Injuries, InjuryStat, CharacterInjury, "issue", "penalty"),
+    (Disabilities, DisabilityStat, CharacterDisability, "issue", "penalty"),
+    (Diseases, DiseaseStat, CharacterDisease, "issue", "penalty"),
+)
+
+
+def stat_modifiers_query(char_nos: list[int] | None = None):
+    """
+    Query for summed buff and penalty deltas, one row per (character, stat).
+
+    :param list[int]|None char_nos: characters to resolve, all if None
+    """
+    sources = []
+    for _, stat_table, link_table, link_column, delta_column in MODIFIER_SOURCES:
+        query = select(
+            link_table.character,
+            stat_table.stat,
+            getattr(stat_table, delta_column).label("delta"),
+        ).join(
+            link_table,
+            onclause=getattr(stat_table, link_column) == getattr(link_table, link_column),
+        )
+        if char_nos is not None:
+            query = query.where(link_table.character.in_(char_nos))  # type: ignore
+        sources.append(query)
+    modifiers = union_all(*sources).subquery()
+    return select(
+        modifiers.c.character, modifiers.c.stat, func.sum(modifiers.c.delta)
+    ).group_by(modifiers.c.character, modifiers.c.stat)
+
+
+def refresh_stat_modifiers(conn: Connection, char_nos: list[int] | None = None) -> None:
+    """
+    Recompute CharacterStatModifiers rows from the source tables.
+
+    :param Connection conn: connection of the current transaction
+    :param list[int]|None char_nos: characters to recompute, all if None
+    """
+    clear = delete(CharacterStatModifiers)
+    if char_nos is not None:
+        clear = clear.where(CharacterStatModifiers.character.in_(char_nos))  # type: ignore
+    conn.execute(clear)
+    conn.execute(
+        insert(CharacterStatModifiers).from_select(
+            ["character", "stat", "total_delta"], stat_modifiers_query(char_nos)
+        )
+    )
+
+
 class Characters(SQLModel, table=True):
     no: int | None = Field(primary_key=True, default=None, index=True)
     name: str = Field(index=True)
-    player_chat_id: int = Field(foreign_key="players.chat_id", ondelete="CASCADE")
+    player_chat_id: int = Field(foreign_key="players.chat_id", ondelete="CASCADE", index=True)
     hunting: int = Field(default=0, sa_column=Column(Integer, default=0))
     agility: int = Field(default=0, sa_column=Column(Integer, default=0))  # Agility
     hearing: int = Field(default=0, sa_column=Column(Integer, default=0))  # Hearing
@@ -440,7 +729,7 @@ class Characters(SQLModel, table=True):
     faith: int = Field(default=0, sa_column=Column(Integer, default=0))
     role: int | None = Field(default=None, foreign_key="roles.no", ondelete="SET NULL")
     clan_no: int | None = Field(
-        default=None, foreign_key="clans.no", ondelete="SET NULL"
+        default=None, foreign_key="clans.no", ondelete="SET NULL", index=True
     )
     hunger: int = 0
     nutrition: int = Field(sa_column=Column(Integer, default=0))
@@ -449,9 +738,9 @@ class Characters(SQLModel, table=True):
     is_dead: bool = False
     curr_hunts: int = 0
     curr_herbs: int = 0
-    hunger_pen: ClassVar[dict[int, int]] = {}
     __table_args__ = (
         UniqueConstraint("name", name="characters_name_unique"),
+        Index("ix_characters_active", "age", sqlite_where=text("is_dead = 0 AND is_frozen = 0")),
         CheckConstraint(stamina.sa_column >= 0),
         CheckConstraint(stamina.sa_column <= 10),
         CheckConstraint(hunting.sa_column >= 0),
@@ -480,7 +769,7 @@ class Characters(SQLModel, table=True):
     
     @property
     def session(self):
-        return Session(engine)
+        return open_session()
 
     @property
     def injuries(self) -> list:
@@ -501,81 +790,52 @@ class Characters(SQLModel, table=True):
         query = select(CharacterDisease).where(CharacterDisease.character == self.no)
         return [t for t in self.session.exec(query).all()]
 
+    @staticmethod
+    def stats():
+        return [
+            "hunting",
+            "agility",
+            "hearing",
+            "smell",
+            "sight",
+            "speed",
+            "stamina",
+            "strength",
+            "combat",
+            "herbalism",
+            "healing",
+            "faith",
+        ]
+
     @computed_field
     @property
     def actual_stats(self) -> dict[str, int]:
         logger.debug(f"Получены актуальные характеристики для {self.name}")
-        return {
-            "hunting": self.get_actual_stat("hunting"),
-            "agility": self.get_actual_stat("agility"),
-            "hearing": self.get_actual_stat("hearing"),
-            "smell": self.get_actual_stat("hearing"),
-            "sight": self.get_actual_stat("sight"),
-            "speed": self.get_actual_stat("speed"),
-            "stamina": self.get_actual_stat("stamina"),
-            "strength": self.get_actual_stat("strength"),
-            "combat": self.get_actual_stat("combat"),
-            "herbalism": self.get_actual_stat("herbalism"),
-            "healing": self.get_actual_stat("healing"),
-            "faith": self.get_actual_stat("faith"),
-        }
+        return self.make_stat_sheet(self.get_modifiers())
     
-    @staticmethod
-    def _get_hunger_pen() -> dict[int, int]:
-        query = select(Settings).where(Settings.name.contains("hunger_pen", autoescape=True))
-        with Session(engine) as s:
-            res: list[Settings] = s.exec(query).all()
-        hunger = {}
-        for i in res:
-            hunger[int(i.name.split("_")[-1])] = int(i.value)
-        return hunger
-
-    def get_actual_stat(self, stat: str) -> int:
-        res = self.__getattribute__(stat)
-        res += self.get_buffs(stat)
-        res += self.get_penalties(stat)
-        if not self.hunger_pen:
-            Characters.hunger_pen = self._get_hunger_pen()
-        res -= self.hunger_pen.get(self.hunger, self.hunger)
-        return res
-
-    def get_buffs(self, stat: str) -> int:
-        # res = self.__getattribute__(stat)
-        res = 0
-        query = (
-            select(BuffsStats)
-            .join(CharacterBuffs, onclause=BuffsStats.buff == CharacterBuffs.buff)  # type: ignore
-            .where(and_(CharacterBuffs.character == self.no, BuffsStats.stat == stat))
+    def get_modifiers(self) -> dict[str, int]:
+        """Total buff and penalty delta for every affected stat."""
+        query = select(CharacterStatModifiers).where(
+            CharacterStatModifiers.character == self.no
         )
         with self.session as s:
-            buff = s.exec(query).all()
-        for i in buff:
-            res += i.increase
-        return res
+            res = s.exec(query).all()
+        return {i.stat: i.total_delta for i in res}
 
-    def get_penalties(self, stat: str) -> int:
-        res = 0
-        table_list = [
-            [InjuryStat, CharacterInjury],
-            [DisabilityStat, CharacterDisability],
-            [DiseaseStat, CharacterDisease],
-        ]
-        for cls_group in table_list:
-            query = (
-                select(cls_group[0])
-                .join(
-                    cls_group[1],
-                    onclause=cls_group[0].issue == cls_group[1].issue,  # type: ignore
-                )
-                .where(
-                    and_(cls_group[1].character == self.no, cls_group[0].stat == stat)
-                )
-            )
-            with self.session as s:
-                pen = s.exec(query).all()
-            for i in pen:
-                res += i.penalty
-        return res
+    def make_stat_sheet(self, modifiers: dict[str, int]) -> dict[str, int]:
+        """
+        Apply modifiers and the hunger penalty to the base stats.
+
+        :param dict[str, int] modifiers: stat -> total delta
+        """
+        hunger_pen = settings_registry.load().get_hunger_pen(self.hunger)
+        return {
+            stat: getattr(self, stat) + modifiers.get(stat, 0) - hunger_pen
+            for stat in self.stats()
+        }
+
+    def get_actual_stat(self, stat: str) -> int:
+        return self.actual_stats[stat]
 
     @staticmethod
     def attrs():
@@ -601,38 +861,46 @@ class Characters(SQLModel, table=True):
     @property
     def clan(self):
         query = select(Clans).where(Clans.no == self.clan_no)
-        with Session(engine) as s:
+        with open_session() as s:
             clans = s.exec(query).one()
         return clans
 
     @property
     def role_whole(self):
         query = select(Roles).where(Roles.no == self.role)
-        with Session(engine) as s:
+        with open_session() as s:
             role = s.exec(query).one()
         return role
 
-    def __str__(self) -> str:
+    def render(
+        self, stats: dict[str, int], clan: str | None, role: str | None
+    ) -> str:
+        """
+        Character card from already resolved related data.
+
+        :param dict[str, int] stats: actual stats of the character
+        :param str|None clan: clan name, None for loners
+        :param str|None role: role name
+        """
         if self.is_dead is True:
             return f"{self.name}: мертв."
-        if not self.clan_no:
-            clan = "бродяга"
-        else:
-            clan = self.clan.name
-        if not self.role:
-            role = "нет"
-        else:
-            role = self.role_whole.name
         return (
-            f"Id: {self.no}\nИмя: {self.name}\nВозраст: {self.age} лун\nАктуальные характеристики:\n{'\n'.join([f'{key}: {value}' for key, value in self.actual_stats.items()])}"
-            f"\nКлан: {clan}\nРоль: {role}\nСтепень голода: {self.hunger}\nЗаморожен: {'да' if self.is_frozen else 'нет'}"
+            f"Id: {self.no}\nИмя: {self.name}\nВозраст: {self.age} лун\nАктуальные характеристики:\n{'\n'.join([f'{key}: {value}' for key, value in stats.items()])}"
+            f"\nКлан: {clan or 'бродяга'}\nРоль: {role or 'нет'}\nСтепень голода: {self.hunger}\nЗаморожен: {'да' if self.is_frozen else 'нет'}"
         )
 
+    def __str__(self) -> str:
+        if self.is_dead is True:
+            return self.render({}, None, None)
+        clan = self.clan.name if self.clan_no else None
+        role = self.role_whole.name if self.role else None
+        return self.render(self.actual_stats, clan, role)
+
 
 class PreyTerritory(SQLModel, table=True):
     no: int | None = Field(primary_key=True, default=None, index=True)
-    prey: int = Field(foreign_key="prey.no", ondelete="CASCADE")
-    territory: int = Field(foreign_key="clans.no", ondelete="CASCADE")
+    prey: int = Field(foreign_key="prey.no", ondelete="CASCADE", index=True)
+    territory: int = Field(foreign_key="clans.no", ondelete="CASCADE", index=True)
 
 
 class Prey(SQLModel, table=True):
@@ -670,37 +938,44 @@ class Prey(SQLModel, table=True):
     @property
     def injury_whole(self):
         query = select(Injuries).where(Injuries.no == self.injury)
-        with Session(engine) as s:
+        with open_session() as s:
             inj = s.exec(query).one()
         return inj
 
     @property
     def territory(self):
         query = select(Clans).join(PreyTerritory).where(PreyTerritory.prey == self.no)
-        with Session(engine) as s:
+        with open_session() as s:
             return s.exec(query).all()
 
-    def __str__(self) -> str:
-        if not self.territory:
-            clan_name = "все"
-        else:
-            clan_name = ", ".join([clan.name for clan in self.territory])
-        if self.injury:
-            inj = self.injury_whole.name
-        else:
-            inj = "нет"
+    def render(self, territories: list[str], injury: str | None) -> str:
+        """
+        Format the prey card from already resolved related data.
+
+        :param list[str] territories: names of the territories the prey lives on
+        :param str|None injury: name of the injury the prey inflicts
+        """
+        clan_name = ", ".join(territories) if territories else "все"
+        inj = injury or "нет"
         return (
             f"Id: {self.no}\nНазвание: {self.name}\nНавык: {self.stat}\nПитательность: {self.amount}\nРедкость: {self.rarity}"
             f"\n\nНеобходимая сумма очков: {self.sum_required}\n"
             f"Территория проживания: {clan_name}\nНаносимое ранение: {inj}\nШанс ранения: {self.injury_chance or 'нет'}"
         )
 
+    def __str__(self) -> str:
+        return self.render(
+            [clan.name for clan in self.territory],
+            self.injury_whole.name if self.injury else None,
+        )
+
 
 class PreyPile(SQLModel, table=True):
     no: int | None = Field(primary_key=True, default=None, index=True)
     clan: int = Field(foreign_key="clans.no", ondelete="CASCADE")
     prey: int = Field(foreign_key="prey.no", ondelete='CASCADE')
-    date_added: datetime = Field(default=datetime.now())
+    date_added: datetime = Field(default_factory=datetime.now)
+    __table_args__ = (Index("ix_preypile_clan_date_added", "clan", "date_added"),)
 
 
 class Ages(SQLModel, table=True):
@@ -741,6 +1016,82 @@ class Settings(SQLModel, table=True):
         )
 
 
+class SettingsSnapshot:
+    """
+    Settings parsed into typed values at one registry version.
+
+    :var int version: registry version the snapshot was loaded at
+    :var dict[str, str] raw: every setting as stored
+    :var int hunt_attempts:
+    :var int herb_attempts:
+    :var int max_hunger:
+    :var int max_age:
+    :var dict[int, int] hunger_pens: configured penalty for a hunger level
+    :var list[int] hunger_pen: penalty for every hunger level up to the highest configured one, index is the level
+    :var float pile_cut_share: share of every pile cut by default
+    :var dict[int, float] pile_cut_shares: share cut per clan no
+    :var dict[int, int] pile_max_ages: max days in the pile per clan no
+    """
+
+    def __init__(self, version: int, settings: list[Settings]) -> None:
+        self.version = version
+        self.raw = {i.name: i.value for i in settings}
+        self.hunt_attempts = int(self.raw.get("hunt_attempts", 0))
+        self.herb_attempts = int(self.raw.get("herb_attempts", 3))
+        self.max_hunger = int(self.raw.get("max_hunger", 0))
+        self.max_age = int(self.raw.get("max_age", 0))
+        self.hunger_pens: dict[int, int] = {}
+        self.pile_cut_share = float(self.raw.get("pile_cut_share", 0.5))
+        self.pile_cut_shares: dict[int, float] = {}
+        self.pile_max_ages: dict[int, int] = {}
+        for name, value in self.raw.items():
+            if name.startswith("hunger_pen_"):
+                self.hunger_pens[int(name.removeprefix("hunger_pen_"))] = int(value)
+            elif name.startswith("pile_cut_share_"):
+                self.pile_cut_shares[int(name.removeprefix("pile_cut_share_"))] = float(value)
+            elif name.startswith("pile_max_age_") and int(value) > 0:
+                self.pile_max_ages[int(name.removeprefix("pile_max_age_"))] = int(value)
+        # Unconfigured levels keep the old fallback of a penalty equal to the level.
+        self.hunger_pen = [
+            self.hunger_pens.get(level, level) for level in range(max(self.hunger_pens, default=0) + 1)
+        ]
+
+    def get_hunger_pen(self, hunger: int) -> int:
+        return self.hunger_pen[hunger] if 0 <= hunger < len(self.hunger_pen) else hunger
+
+
+class SettingsRegistry:
+    """
+    Process-wide parsed settings shared by the bot and the scheduler.
+
+    A snapshot is never changed once built, readers keep one snapshot for a whole operation.
+
+    :var int version: bumped after every committed settings change
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._snapshot: SettingsSnapshot | None = None
+        self._lock = Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+
+    def load(self) -> SettingsSnapshot:
+        snapshot = self._snapshot
+        if snapshot and snapshot.version == self.version:
+            return snapshot
+        with self._lock:
+            if not self._snapshot or self._snapshot.version != self.version:
+                with Session(engine) as s:
+                    self._snapshot = SettingsSnapshot(self.version, s.exec(select(Settings)).all())
+            return self._snapshot
+
+
+settings_registry = SettingsRegistry()
+
+
 class CharacterHistory(SQLModel, table=True):
     no: int | None = Field(primary_key=True, default=None, index=True)
     char_no: int = Field(foreign_key="characters.no", ondelete="CASCADE", index=True)
@@ -754,31 +1105,107 @@ class CharacterHistory(SQLModel, table=True):
 
 class DbBrowser:
     def __init__(self) -> None:
-        self.session = Session(engine, expire_on_commit=False)
-        self.async_session = AsyncSession(as_engine)
+        self.session = open_session(expire_on_commit=False)
+        self._async_session: AsyncSession | None = None
+
+    @property
+    def async_session(self) -> AsyncSession:
+        if self._async_session is None:
+            self._async_session = open_async_session()
+        return self._async_session
 
     def commit(self):
         self.session.commit()
 
+    def after_commit(self, fn: Callable[[], None]) -> None:
+        """Run fn once the session's current transaction is committed, drop it on rollback."""
+        callbacks = self.session.info.setdefault("after_commit", [])
+        if fn not in callbacks:
+            callbacks.append(fn)
+
+    def as_after_commit(self, fn: Callable[[], None]) -> None:
+        callbacks = self.async_session.sync_session.info.setdefault("after_commit", [])
+        if fn not in callbacks:
+            callbacks.append(fn)
+
     def add(self, table):
-        with self.session as s:
+        with self.transaction() as s:
             s.add(table)
-            self.commit()
     
     async def as_add(self, table: type[SQLModel]):
-        async with self.async_session as s:
+        async with self.as_transaction() as s:
             s.add(table)
-            await s.commit()
 
     def delete(self, table):
-        with self.session as s:
+        with self.transaction() as s:
             s.delete(table)
-            self.commit()
     
     async def as_delete(self, table: type[SQLModel]):
+        async with self.as_transaction() as s:
+            await s.delete(table)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Session]:
+        """
+        Run several writes on the session and commit them once, rolling back on error.
+
+        Inside a unit of work the writes go to a savepoint instead: a failed write rolls back
+        only itself and the shared session stays usable for the rest of the update.
+        """
+        with self.session as s:
+            if isinstance(s, UnitOfWorkSession):
+                with s.begin_nested():
+                    yield s
+                    self.commit()
+                return
+            try:
+                yield s
+                self.commit()
+            except Exception:
+                s.rollback()
+                raise
+
+    @asynccontextmanager
+    async def as_transaction(self) -> AsyncIterator[AsyncSession]:
         async with self.async_session as s:
-            s.delete(table)
-            await s.commit()
+            if isinstance(s, UnitOfWorkAsyncSession):
+                async with s.begin_nested():
+                    yield s
+                    await s.commit()
+                return
+            try:
+                yield s
+                await s.commit()
+            except Exception:
+                await s.rollback()
+                raise
+
+    def add_many(self, tables: Iterable[SQLModel]) -> None:
+        with self.transaction() as s:
+            s.add_all(tables)
+
+    async def as_add_many(self, tables: Iterable[SQLModel]) -> None:
+        async with self.as_transaction() as s:
+            s.add_all(tables)
+
+    def delete_many(self, tables: Iterable[SQLModel]) -> None:
+        with self.transaction() as s:
+            for table in tables:
+                s.delete(table)
+
+    async def as_delete_many(self, tables: Iterable[SQLModel]) -> None:
+        async with self.as_transaction() as s:
+            for table in tables:
+                await s.delete(table)
+
+    def update(self, query: Update) -> int:
+        """Run a bulk UPDATE in one transaction and return the number of rows it changed."""
+        with self.transaction() as s:
+            return s.exec(query).rowcount  # type: ignore
+
+    async def as_update(self, query: Update) -> int:
+        async with self.as_transaction() as s:
+            return (await s.exec(query)).rowcount  # type: ignore
 
     def select_one(self, query: SelectOfScalar) -> type[SQLModel]:
         with self.session as s:
@@ -808,42 +1235,210 @@ class DbBrowser:
             return res.first()
     
     def fill_default(self) -> None:
-        if not self.select_many(select(Ages)):
-            for i in AGES:
-                self.add(Ages(**i))
-        if not self.select_many(select(Seasons)):
-            for i in SEASONS:
-                self.add(Seasons(**i))
-        if not self.select_many(select(Clans)):
-            for i in CLANS:
-                self.add(Clans(**i))
-        if not self.select_many(select(Settings)):
-            for i in SETTINGS:
-                self.add(Settings(**i))
+        defaults = []
+        for table, rows in ((Ages, AGES), (Seasons, SEASONS), (Clans, CLANS), (Settings, SETTINGS)):
+            if not self.select_many(select(table)):
+                defaults.extend(table(**i) for i in rows)
+        self.add_many(defaults)
         return None
     
+    def rebuild_stat_modifiers(self) -> int:
+        """
+        Recompute the whole CharacterStatModifiers table from the source tables.
+
+        :return: number of rows that were missing, stale or superfluous
+        """
+        with self.transaction() as s:
+            stored = {
+                (i.character, i.stat): i.total_delta
+                for i in s.exec(select(CharacterStatModifiers)).all()
+            }
+            actual = {
+                (char, stat): delta
+                for char, stat, delta in s.exec(stat_modifiers_query()).all()
+            }
+            refresh_stat_modifiers(s.connection())
+        return sum(stored.get(key) != actual.get(key) for key in stored.keys() | actual.keys())
+
     def ins_char_hist(self, char, user, field, old, new, reason):
         self.add(CharacterHistory(char_no=char, user=user, field=field, old=old, new=new, reason=reason))
+
+    async def as_ins_char_hist(self, char, user, field, old, new, reason):
+        await self.as_add(CharacterHistory(char_no=char, user=user, field=field, old=old, new=new, reason=reason))
     
     def add_admins(self, ids: list[str], usernames: list[str]):
-        for id, username in zip(ids, usernames):
-            username = username.replace("'", "")
-            with self.session as s:
-                query = select(Players).where(Players.chat_id == int(id))
-                if not s.exec(query).all():
-                    admin = Players(
-                        chat_id=int(id),
-                        username=username,
-                        is_admin=True,
-                        is_superuser=True,
-                    )
-                    self.add(admin)
+        existing = set(self.select_many(select(Players.chat_id).where(Players.chat_id.in_([int(i) for i in ids]))))
+        self.add_many(
+            Players(
+                chat_id=int(id),
+                username=username.replace("'", ""),
+                is_admin=True,
+                is_superuser=True,
+            )
+            for id, username in zip(ids, usernames)
+            if int(id) not in existing
+        )
+
+
+def _linked_chars(session: Session, link_table, link_column: str, issues: set[int]):
+    query = select(link_table.character).where(
+        getattr(link_table, link_column).in_(issues)
+    )
+    return session.connection().execute(query).scalars()
+
+
+@event.listens_for(DbSession, "before_flush")
+def _collect_stat_modifier_changes(session: Session, flush_context, instances) -> None:
+    """Remember characters whose stat modifiers are affected by the pending flush."""
+    chars: set[int] = session.info.setdefault("stat_modifier_chars", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        for parent, stat_table, link_table, link_column, _ in MODIFIER_SOURCES:
+            if isinstance(obj, link_table):
+                history = inspect(obj).attrs.character.history
+                chars.update({obj.character, *history.deleted})
+            elif isinstance(obj, stat_table):
+                history = inspect(obj).attrs[link_column].history
+                issues = {getattr(obj, link_column), *history.deleted}
+                chars.update(_linked_chars(session, link_table, link_column, issues))
+            elif isinstance(obj, parent) and obj in session.deleted:
+                chars.update(_linked_chars(session, link_table, link_column, {obj.no}))
+
+
+@event.listens_for(DbSession, "after_flush")
+def _apply_stat_modifier_changes(session: Session, flush_context) -> None:
+    if chars := session.info.pop("stat_modifier_chars", None):
+        refresh_stat_modifiers(session.connection(), list(chars))
+
+
+_MODIFIER_ROW_TABLES = {
+    table for _, stat_table, link_table, _, _ in MODIFIER_SOURCES for table in (stat_table, link_table)
+}
+
+
+def _deleted_modifier_chars(statement: Delete):
+    """Query for the characters linked to the rows a bulk DELETE removes, None if it is not a modifier source."""
+    entity = statement.entity_description["entity"]
+    for parent, stat_table, link_table, link_column, _ in MODIFIER_SOURCES:
+        link = getattr(link_table, link_column)
+        if entity is link_table:
+            query = select(link_table.character)
+        elif entity is stat_table:
+            query = select(link_table.character).join(stat_table, onclause=getattr(stat_table, link_column) == link)
+        elif entity is parent:
+            query = select(link_table.character).join(parent, onclause=parent.no == link)
+        else:
+            continue
+        return query if statement.whereclause is None else query.where(statement.whereclause)
+    return None
+
+
+@event.listens_for(DbSession, "do_orm_execute")
+def _apply_bulk_stat_modifier_changes(state) -> Any:
+    """
+    Recompute stat modifiers after a bulk statement on their sources, such statements skip the flush.
+
+    A bulk DELETE recomputes the characters it unlinks. Inserted and updated rows may link any
+    character, so those recompute everyone.
+    """
+    if state.is_delete:
+        chars = _deleted_modifier_chars(state.statement)
+        if chars is None:
+            return None
+    elif state.is_insert or state.is_update:
+        if state.statement.entity_description["entity"] not in _MODIFIER_ROW_TABLES:
+            return None
+        chars = None
+    else:
+        return None
+    conn = state.session.connection()
+    char_nos = list(conn.execute(chars).scalars()) if chars is not None else None
+    result = state.invoke_statement()
+    refresh_stat_modifiers(conn, char_nos)
+    return result
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    # Also fired when a savepoint is released, the callbacks wait for the outer commit.
+    if session.in_nested_transaction():
+        return
+    session.info.pop("writes", None)
+    for fn in session.info.pop("after_commit", []):
+        fn()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_after_commit(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop("writes", None)
+        session.info.pop("after_commit", None)
+
+
+@event.listens_for(UnitOfWorkSession, "before_flush")
+def _check_flush_writes(session: Session, flush_context, instances) -> None:
+    if session.new or session.deleted or any(session.is_modified(obj) for obj in session.dirty):
+        session.info["unit_of_work"].writing(session)
+
+
+@event.listens_for(UnitOfWorkSession, "do_orm_execute")
+def _check_statement_writes(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["unit_of_work"].writing(state.session)
+
+
+def plan_check_queries() -> dict[str, Any]:
+    """Hot lookups whose query plans must not fall back to a full table scan."""
+    active = and_(Characters.is_dead == False, Characters.is_frozen == False)  # noqa: E712
+    return {
+        "characters crossing age": select(Characters).where(active, Characters.age.in_([4, 10])),  # type: ignore
+        "characters of player": select(Characters).where(Characters.player_chat_id == 0),
+        "characters of clan": select(Characters).where(Characters.clan_no == 0),
+        "stat modifiers of characters": select(CharacterStatModifiers).where(
+            CharacterStatModifiers.character.in_([0])  # type: ignore
+        ),
+        "stat modifier sources": stat_modifiers_query([0]),
+        "injuries of character": select(CharacterInjury).where(CharacterInjury.character == 0),
+        "buffs of character": select(CharacterBuffs).where(CharacterBuffs.character == 0),
+        "diseases of character": select(CharacterDisease).where(CharacterDisease.character == 0),
+        "disabilities of character": select(CharacterDisability).where(CharacterDisability.character == 0),
+        "inventory of character": select(CharacterInventory).where(CharacterInventory.char_no == 0),
+        "pile of clan": select(PreyPile).where(PreyPile.clan == 0),
+        "prey of territory": select(Prey).join(PreyTerritory, Prey.no == PreyTerritory.prey).where(
+            PreyTerritory.territory == 0
+        ),
+        "territories of prey": select(PreyTerritory).where(PreyTerritory.prey == 0),
+        "player by chat id": select(Players).where(Players.chat_id == 0),
+        "player by username": select(Players).where(Players.username == ""),
+        "setting by name": select(Settings).where(Settings.name == ""),
+    }
+
+
+def find_table_scans(url: str | None = None) -> dict[str, list[str]]:
+    """
+    Run EXPLAIN QUERY PLAN over plan_check_queries.
+
+    :param url: database to check, the bot database by default
+    :return: query names mapped to the plan steps that scan a whole table or index
+    """
+    scans = {}
+    # A fresh connection, since pooled ones keep cached EXPLAIN statements across schema changes.
+    plan_engine = create_engine(url or engine.url, poolclass=NullPool)
+    with plan_engine.connect() as c:
+        for name, query in plan_check_queries().items():
+            sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+            steps = [row[3] for row in c.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+            # A covering index scan still reads every row, only SEARCH narrows the lookup.
+            bad = [i for i in steps if i.startswith("SCAN ") and i.split()[1] in SQLModel.metadata.tables]
+            if bad:
+                scans[name] = bad
+    plan_engine.dispose()
+    return scans
 
 
 def create_tables() -> None:
     """Created baseline tables if they do not exist already."""
-    with engine.connect() as c:
-        cur = c.connection.cursor()
-        cur.execute('PRAGMA foreign_keys = ON;')
     SQLModel.metadata.create_all(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
     DbBrowser().fill_default()
@@ -1,6 +1,27 @@
+from bisect import bisect_right
+
 from sqlmodel import select
 
 from db import Ages, DbBrowser
+from db.cache import reference_cache
+
+
+class AgeBrackets:
+    """
+    Ages sorted by max_age for resolving a character's age bracket with bisect.
+
+    :var ages: age brackets ordered by max_age
+    :var bounds: max_age of every bracket, in the same order
+    """
+
+    def __init__(self, ages: list[Ages]) -> None:
+        self.ages = sorted(ages, key=lambda age: age.max_age)
+        self.bounds = [age.max_age for age in self.ages]
+
+    def get(self, age: int) -> Ages:
+        """Return the first bracket with max_age above age, or the oldest one."""
+        i = bisect_right(self.bounds, age)
+        return self.ages[min(i, len(self.ages) - 1)]
 
 
 class AgeConfig(DbBrowser):
@@ -8,8 +29,15 @@ class AgeConfig(DbBrowser):
     def __init__(self):
         super().__init__()
     
+    def commit(self):
+        self.after_commit(reference_cache.invalidate)
+        super().commit()
+
     def get_ages(self):
         return self.select_many(select(Ages))
+
+    def get_brackets(self) -> AgeBrackets:
+        return AgeBrackets(reference_cache.get_ages())
     
     def new_age(self, params: dict):
         return self.add(Ages(**params))
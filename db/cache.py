@@ -0,0 +1,143 @@
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+
+from sqlmodel import select
+
+from db import Ages, Clans, Herbs, Prey, PreyTerritory, Seasons, Session, engine
+from logs.logs import main_logger as logger
+
+
+HERB_ROLLS = 100
+
+
+class ReferenceSnapshot:
+    """
+    Reference tables loaded at one cache version.
+
+    Objects are detached from their session and shared between handlers, they must not be edited.
+
+    :var int version: cache version the snapshot was loaded at
+    :var list[Seasons] seasons:
+    :var Seasons|None active_season:
+    :var list[Ages] ages:
+    :var dict[int, Clans] clans_by_no:
+    :var dict[str, Clans] clans_by_name:
+    :var dict[int, Prey] prey_by_no:
+    :var dict[str, Prey] prey_by_name:
+    :var dict[int, list[Prey]] prey_by_territory: prey for every territory, one entry per territory link
+    :var dict[int, list[int]] rarity_by_territory: rarities of prey_by_territory, sorted ascending
+    :var dict[int | None, list[tuple[Herbs, ...]]] herb_buckets: herbs found with every roll from 1 to 100
+        for a territory no, -1 for neutral ground and None for herbs growing anywhere
+    """
+
+    def __init__(self, version: int) -> None:
+        self.version = version
+        # Own session, so the unit of work never shares or expires the cached objects.
+        with Session(engine, expire_on_commit=False) as s:
+            self.seasons = list(s.exec(select(Seasons)).all())
+            self.ages = list(s.exec(select(Ages)).all())
+            clans = s.exec(select(Clans)).all()
+            prey = s.exec(select(Prey)).all()
+            links = s.exec(select(PreyTerritory.territory, PreyTerritory.prey)).all()
+            herbs = s.exec(select(Herbs)).all()
+        self.active_season = next((i for i in self.seasons if i.is_active), None)
+        self.clans_by_no = {clan.no: clan for clan in clans}
+        self.clans_by_name = {clan.name: clan for clan in clans}
+        self.prey_by_no = {i.no: i for i in prey}
+        self.prey_by_name = {i.name: i for i in prey}
+        self.prey_by_territory: dict[int, list[Prey]] = defaultdict(list)
+        for territory, prey_no in links:
+            self.prey_by_territory[territory].append(self.prey_by_no[prey_no])
+        self.rarity_by_territory: dict[int, list[int]] = {}
+        for territory, territory_prey in self.prey_by_territory.items():
+            territory_prey.sort(key=lambda prey: prey.rarity)
+            self.rarity_by_territory[territory] = [prey.rarity for prey in territory_prey]
+        self.herb_buckets = self._make_herb_buckets(herbs)
+
+    @staticmethod
+    def _make_herb_buckets(herbs: list[Herbs]) -> dict[int | None, list[tuple[Herbs, ...]]]:
+        by_territory: dict[int | None, list[list[Herbs]]] = defaultdict(lambda: [[] for _ in range(HERB_ROLLS)])
+        for herb in herbs:
+            for res in range(max(herb.rarity_min, 1), min(herb.rarity_max, HERB_ROLLS) + 1):
+                by_territory[herb.territory][res - 1].append(herb)
+        anywhere = by_territory.pop(None, [[] for _ in range(HERB_ROLLS)])
+        buckets = {
+            territory: [tuple(anywhere[i] + bucket[i]) for i in range(HERB_ROLLS)]
+            for territory, bucket in by_territory.items()
+        }
+        buckets[None] = [tuple(bucket) for bucket in anywhere]
+        return buckets
+
+
+class ReferenceCache:
+    """
+    Process-wide cache of seasons, ages, clans and prey.
+
+    Writers bump the version after their commit, the next read reloads the snapshot.
+
+    :var int version: current version of the reference data
+    :var int hits: reads served from a current snapshot
+    :var int misses: reads that had to reload the snapshot
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._snapshot: ReferenceSnapshot | None = None
+        self._lock = Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+        logger.debug(f"Reference cache invalidated, version {self.version}")
+
+    def load(self) -> ReferenceSnapshot:
+        snapshot = self._snapshot
+        if snapshot and snapshot.version == self.version:
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            self.misses += 1
+            if not self._snapshot or self._snapshot.version != self.version:
+                self._snapshot = ReferenceSnapshot(self.version)
+            return self._snapshot
+
+    def stats(self) -> dict[str, int]:
+        return {"version": self.version, "hits": self.hits, "misses": self.misses}
+
+    def get_active_season(self) -> Seasons | None:
+        return self.load().active_season
+
+    def get_ages(self) -> list[Ages]:
+        return self.load().ages
+
+    def get_clan_by_name(self, name: str) -> Clans | None:
+        return self.load().clans_by_name.get(name.capitalize())
+
+    def get_clan_by_no(self, no: int | str) -> Clans | None:
+        return self.load().clans_by_no.get(int(no))
+
+    def get_prey_by_name(self, name: str) -> Prey | None:
+        return self.load().prey_by_name.get(name)
+
+    def get_prey_by_no(self, no: int | str) -> Prey | None:
+        return self.load().prey_by_no.get(int(no))
+
+    def get_prey_for_territory(self, territory: int) -> list[Prey]:
+        return self.load().prey_by_territory.get(territory, [])
+
+    def get_herbs_for_roll(self, territory: int | None, res: int) -> tuple[Herbs, ...]:
+        """Herbs of the territory (-1 for neutral ground) and herbs growing anywhere found with res."""
+        buckets = self.load().herb_buckets
+        return buckets.get(territory, buckets[None])[res - 1]
+
+    def get_prey_for_roll(self, territory: int, res: int, mod: int) -> list[Prey]:
+        """Prey of the territory with rarity + mod >= res, sorted by rarity."""
+        snapshot = self.load()
+        rarities = snapshot.rarity_by_territory.get(territory, [])
+        return snapshot.prey_by_territory.get(territory, [])[bisect_left(rarities, res - mod):]
+
+
+reference_cache = ReferenceCache()
@@ -1,8 +1,10 @@
+from collections import defaultdict
 from typing import Any
 
-from sqlmodel import Session, and_, select
+from sqlmodel import Session, and_, select, update
 
-from db import Characters, DbBrowser
+from db import (CharacterHistory, CharacterStatModifiers, Characters, Clans,
+                DbBrowser, Roles)
 from db.clans import DbClanConfig
 from exceptions import NotRealClanError
 
@@ -15,16 +17,22 @@ class DbCharacterUser(DbBrowser):
         self.chat_id = chat_id
 
     def get_all_own_chars(self):
-        query = select(Characters).where(Characters.player_chat_id == self.chat_id)
         with self.session as s:
-            return s.exec(query).all()
+            return s.exec(self._own_chars_query(self.chat_id)).all()
 
     def get_one_own_char(self, name: str):
-        query = select(Characters).where(
-            and_(Characters.player_chat_id == self.chat_id, Characters.name == name)
-        )
         with self.session as s:
-            return s.exec(query).first()
+            return s.exec(self._own_char_query(self.chat_id, name)).first()
+
+    @staticmethod
+    def _own_chars_query(chat_id: int):
+        return select(Characters).where(Characters.player_chat_id == chat_id)
+
+    @staticmethod
+    def _own_char_query(chat_id: int, name: str):
+        return select(Characters).where(
+            and_(Characters.player_chat_id == chat_id, Characters.name == name)
+        )
 
 
 class DbCharacterConfig(DbBrowser):
@@ -35,14 +43,12 @@ class DbCharacterConfig(DbBrowser):
         self.admin = admin
 
     def get_char_by_name(self, name: str):
-        query = select(Characters).where(Characters.name == name)
         with self.session as s:
-            return s.exec(query).first()
+            return s.exec(self._by_name_query(name)).first()
 
     def get_char_by_no(self, no: int):
-        query = select(Characters).where(Characters.no == no)
         with self.session as s:
-            return s.exec(query).first()
+            return s.exec(self._by_no_query(no)).first()
 
     def get_chars_for_player(self, chat_id: int):
         query = select(Characters).where(Characters.player_chat_id == chat_id)
@@ -64,10 +70,7 @@ class DbCharacterConfig(DbBrowser):
 
     def edit_character(self, name: str, params: dict[str, Any], reason: str):
         char = self.get_char_by_name(name.capitalize())
-        for column, value in params.items():
-            self.ins_char_hist(char.no, self.admin, column, getattr(char, column), str(value), reason)
-            char = self._edit_single_stat(char, column, value)
-        self.add(char)
+        self.add_many(self._edit_rows(char, params, self.admin, reason))
 
     def delete_character_by_no(self, no: int):
         char = self.get_char_by_no(no)
@@ -109,9 +112,118 @@ class DbCharacterConfig(DbBrowser):
             chars = s.exec(query).all()
         return chars
 
+    def get_stat_sheets(self, chars: list[Characters]) -> dict[int, dict[str, int]]:
+        """Actual stats for many characters from one modifier query, by char no."""
+        return self._stat_sheets(chars, self.select_many(self._modifiers_query(chars)))
+
+    def get_clan_names(self, chars: list[Characters]) -> dict[int, str]:
+        """Clan names for many characters, by char no. Loners are skipped."""
+        names = dict(self.select_many(self._clan_names_query(chars)))
+        return self._names_by_char(chars, "clan_no", names)
+
+    def get_role_names(self, chars: list[Characters]) -> dict[int, str]:
+        """Role names for many characters, by char no. Characters without a role are skipped."""
+        names = dict(self.select_many(self._role_names_query(chars)))
+        return self._names_by_char(chars, "role", names)
+
+    def render_chars(self, chars: list[Characters]) -> list[str]:
+        """Character cards for a list view, resolved with a fixed number of queries."""
+        alive = [char for char in chars if not char.is_dead]
+        return self._render(
+            chars,
+            self.get_stat_sheets(alive),
+            self.get_clan_names(alive),
+            self.get_role_names(alive),
+        )
+
+    def reserve_attempt(self, no: int, column: str, limit: int) -> bool:
+        """
+        Take one attempt of an active character in a single conditional UPDATE.
+
+        :param column: attempt counter, curr_hunts or curr_herbs
+        :return: False if the character is dead, frozen or has no attempts left
+        """
+        return self.update(self._reserve_query(no, column, limit)) == 1
+
+    @staticmethod
+    def _reserve_query(no: int, column: str, limit: int):
+        counter = getattr(Characters, column)
+        return (
+            update(Characters)
+            .where(
+                Characters.no == no,
+                counter < limit,
+                Characters.is_dead == False,  # noqa: E712
+                Characters.is_frozen == False,  # noqa: E712
+            )
+            .values({column: counter + 1})
+        )
+
+    @staticmethod
+    def _by_name_query(name: str):
+        return select(Characters).where(Characters.name == name)
+
+    @staticmethod
+    def _by_no_query(no: int):
+        return select(Characters).where(Characters.no == no)
+
+    @staticmethod
+    def _edit_rows(char: Characters, params: dict[str, Any], admin: str | None, reason: str) -> list:
+        """Applies params to char, returns the history rows followed by the edited character."""
+        history = []
+        for column, value in params.items():
+            history.append(CharacterHistory(
+                char_no=char.no, user=admin, field=column, old=getattr(char, column), new=str(value), reason=reason
+            ))
+            char = DbCharacterConfig._edit_single_stat(char, column, value)
+        return [*history, char]
+
+    @staticmethod
+    def _modifiers_query(chars: list[Characters]):
+        return select(CharacterStatModifiers).where(
+            CharacterStatModifiers.character.in_([char.no for char in chars])  # type: ignore
+        )
+
+    @staticmethod
+    def _stat_sheets(
+        chars: list[Characters], rows: list[CharacterStatModifiers]
+    ) -> dict[int, dict[str, int]]:
+        modifiers: dict[int, dict[str, int]] = defaultdict(dict)
+        for i in rows:
+            modifiers[i.character][i.stat] = i.total_delta
+        return {char.no: char.make_stat_sheet(modifiers[char.no]) for char in chars}
+
+    @staticmethod
+    def _clan_names_query(chars: list[Characters]):
+        return select(Clans.no, Clans.name).where(
+            Clans.no.in_({char.clan_no for char in chars if char.clan_no})  # type: ignore
+        )
+
+    @staticmethod
+    def _role_names_query(chars: list[Characters]):
+        return select(Roles.no, Roles.name).where(
+            Roles.no.in_({char.role for char in chars if char.role})  # type: ignore
+        )
+
+    @staticmethod
+    def _names_by_char(
+        chars: list[Characters], column: str, names: dict[int, str]
+    ) -> dict[int, str]:
+        return {
+            char.no: names[getattr(char, column)]
+            for char in chars
+            if getattr(char, column) in names
+        }
+
+    @staticmethod
+    def _render(chars: list[Characters], stats: dict, clans: dict, roles: dict) -> list[str]:
+        return [
+            char.render(stats.get(char.no, {}), clans.get(char.no), roles.get(char.no))
+            for char in chars
+        ]
+
     @staticmethod
     def _edit_single_stat(char: Characters, stat: str, value: Any):
-        print(stat, value)
         if stat == "clan_no":
             try:
                 int(value)
@@ -123,3 +235,53 @@ class DbCharacterConfig(DbBrowser):
                     raise NotRealClanError
         setattr(char, stat, value)
         return char
+
+
+class AsyncDbCharacterUser(DbBrowser):
+    """Async variant of DbCharacterUser for the bot handlers."""
+
+    def __init__(self, chat_id: int) -> None:
+        super().__init__()
+        self.chat_id = chat_id
+
+    async def get_all_own_chars(self):
+        return await self.as_select_many(DbCharacterUser._own_chars_query(self.chat_id))
+
+    async def get_one_own_char(self, name: str):
+        return await self.as_safe_select_one(DbCharacterUser._own_char_query(self.chat_id, name))
+
+
+class AsyncDbCharacterConfig(DbBrowser):
+    """Async variant of DbCharacterConfig for the bot handlers."""
+
+    def __init__(self, admin: str | None = "") -> None:
+        super().__init__()
+        self.admin = admin
+
+    async def get_char_by_name(self, name: str):
+        return await self.as_safe_select_one(DbCharacterConfig._by_name_query(name))
+
+    async def get_char_by_no(self, no: int):
+        return await self.as_safe_select_one(DbCharacterConfig._by_no_query(no))
+
+    async def edit_character(self, name: str, params: dict[str, Any], reason: str):
+        char = await self.get_char_by_name(name.capitalize())
+        await self.as_add_many(DbCharacterConfig._edit_rows(char, params, self.admin, reason))
+
+    async def reserve_attempt(self, no: int, column: str, limit: int) -> bool:
+        return await self.as_update(DbCharacterConfig._reserve_query(no, column, limit)) == 1
+
+    async def get_stat_sheets(self, chars: list[Characters]) -> dict[int, dict[str, int]]:
+        rows = await self.as_select_many(DbCharacterConfig._modifiers_query(chars))
+        return DbCharacterConfig._stat_sheets(chars, rows)
+
+    async def render_chars(self, chars: list[Characters]) -> list[str]:
+        alive = [char for char in chars if not char.is_dead]
+        clans = dict(await self.as_select_many(DbCharacterConfig._clan_names_query(alive)))
+        roles = dict(await self.as_select_many(DbCharacterConfig._role_names_query(alive)))
+        return DbCharacterConfig._render(
+            chars,
+            await self.get_stat_sheets(alive),
+            DbCharacterConfig._names_by_char(alive, "clan_no", clans),
+            DbCharacterConfig._names_by_char(alive, "role", roles),
+        )
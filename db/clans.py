@@ -3,6 +3,7 @@ from typing import Any, overload
 from sqlmodel import Session, and_, select
 
 from db import Clans, DbBrowser
+from db.cache import reference_cache
 
 
 class DbClanConfig(DbBrowser):
@@ -11,6 +12,10 @@ class DbClanConfig(DbBrowser):
     def __init__(self) -> None:
         super().__init__()
 
+    def commit(self):
+        self.after_commit(reference_cache.invalidate)
+        super().commit()
+
     def get_all_clans(self):
         query = select(Clans).where(Clans.is_true_clan == True)  # type: ignore
         return self.select_many(query)
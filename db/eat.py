@@ -1,8 +1,8 @@
 from typing import overload
 
 from db import Characters, DbBrowser, Prey
-from db.characters import DbCharacterConfig
-from db.prey import DbPreyConfig
+from db.characters import AsyncDbCharacterConfig, DbCharacterConfig
+from db.prey import AsyncDbPreyConfig, DbPreyConfig
 
 
 class Eater(DbBrowser):
@@ -28,6 +28,31 @@ class Eater(DbBrowser):
             char = self.char_db.get_char_by_no(char)
         if isinstance(prey, int):
             prey = self.prey_db.get_prey_by_no(prey)
+        self.add(self._feed(char, prey))
+        return self._message(char, prey)
+
+    @staticmethod
+    def _feed(char: Characters, prey: Prey) -> Characters:
         char.nutrition += prey.amount
-        self.add(char)
+        return char
+
+    @staticmethod
+    def _message(char: Characters, prey: Prey) -> str:
         return f"{char.name} съел {prey.name}!"
+
+
+class AsyncEater(DbBrowser):
+    """Async variant of Eater for the bot handlers."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.prey_db = AsyncDbPreyConfig()
+        self.char_db = AsyncDbCharacterConfig()
+
+    async def eat(self, char: int | Characters, prey: int | Prey) -> str:
+        if isinstance(char, int):
+            char = await self.char_db.get_char_by_no(char)
+        if isinstance(prey, int):
+            prey = await self.prey_db.get_prey_by_no(prey)
+        await self.as_add(Eater._feed(char, prey))
+        return Eater._message(char, prey)
@@ -1,8 +1,11 @@
 from random import choice, randint
 
-from sqlmodel import Session, and_, or_, select
+from sqlmodel import Session, select
 
-from db import CharacterInventory, Characters, Clans, DbBrowser, Herbs
+from db import CharacterInventory, Characters, Clans, DbBrowser, Herbs, settings_registry
+from db.cache import reference_cache
+from db.characters import DbCharacterConfig
+from exceptions import CharacterDeadException, CharacterFrozenException, TooMuchGatheringError
 from logs.logs import main_logger as logger
 from roll import roll
 
@@ -28,26 +31,19 @@ class HerbUser(DbBrowser):
         self.herb = self.get_herb()
 
     def gather(self) -> tuple[Herbs | None, bool]:
+        if self.char.is_frozen:
+            raise CharacterFrozenException
+        if self.char.is_dead:
+            raise CharacterDeadException
+        limit = settings_registry.load().herb_attempts
+        if not DbCharacterConfig().reserve_attempt(self.char.no, "curr_herbs", limit):
+            raise TooMuchGatheringError
         return self.herb, self.check_success()
 
     def get_herb(self) -> Herbs | None:
         res = roll()
         logger.debug(f"roll result for herbalism: {res}")
-        query = select(Herbs).where(
-            and_(
-                Herbs.rarity_max >= res,
-                Herbs.rarity_min <= res,
-                (
-                    or_(
-                        Herbs.territory == None,
-                        Herbs.territory
-                        == (self.territory.no if self.territory else -1),
-                    )
-                ),
-            )
-        )
-        with self.session as s:
-            poss_herb = s.exec(query).all()
+        poss_herb = reference_cache.get_herbs_for_roll(self.territory.no if self.territory else -1, res)
         try:
             herb = choice(poss_herb)
         except IndexError:
@@ -58,7 +54,8 @@ class HerbUser(DbBrowser):
     def check_success(self):
         if not self.herb:
             return False
-        res = self.char.actual_stats["healing"] + self.char.actual_stats["herbalism"]
+        stats = self.char.actual_stats
+        res = stats["healing"] + stats["herbalism"]
         if self.herb.sum_required > res:
             logger.debug(f"Провал собирательства: {self.char.name}, {self.herb.name}")
             return False
@@ -72,6 +69,10 @@ class HerbConfig(DbBrowser):
     def __init__(self) -> None:
         super().__init__()
 
+    def commit(self):
+        self.after_commit(reference_cache.invalidate)
+        super().commit()
+
     def add_herb(self, params: dict):
         herb = Herbs(**params)
         self.add(herb)
@@ -87,10 +88,21 @@ class HerbConfig(DbBrowser):
         return self.select_many(select(Herbs))
     
     def get_herb_by_no(self, no: int) -> Herbs | None:
-        return self.safe_select_one(select(Herbs).where(Herbs.no == no))
+        return self.safe_select_one(self._by_no_query(no))
+
+    @staticmethod
+    def _by_no_query(no: int):
+        return select(Herbs).where(Herbs.no == no)
 
     def edit_herb(self, name: str, params: dict[str, str | int | None]):
         herb = self.get_herb_by_name(name.capitalize())
         for key, value in params.items():
             setattr(herb, key, value)
         self.add(herb)
+
+
+class AsyncHerbConfig(DbBrowser):
+    """Async variant of HerbConfig for the bot handlers."""
+
+    async def get_herb_by_no(self, no: int) -> Herbs | None:
+        return await self.as_safe_select_one(HerbConfig._by_no_query(no))
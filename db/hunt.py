@@ -1,10 +1,12 @@
 from random import choice, randint
 from sqlite3 import IntegrityError
 
-from sqlmodel import Session, and_, select
+from sqlmodel import Session, select
 
-from db import Characters, Clans, DbBrowser, Prey, PreyTerritory, Seasons, Settings
-from db.characters import DbCharacterConfig
+from db import (Characters, Clans, DbBrowser, Prey, SettingsSnapshot, UnitOfWork,
+                settings_registry)
+from db.cache import reference_cache
+from db.characters import AsyncDbCharacterConfig, DbCharacterConfig
 from db.injuries import DbInjuryCharacter
 from exceptions import (CharacterDeadException, CharacterFrozenException,
                         NoItemFoundDbError, TooMuchHuntingError)
@@ -30,46 +32,36 @@ class Hunt(DbBrowser):
 
     def hunt(self) -> tuple[Prey | None, bool]:
         self.validate_char()
-        res = self.check_success()
-        self.char_config.edit_character(self.char.name, {"curr_hunts": self.char.curr_hunts+1})
+        if not self.char_config.reserve_attempt(self.char.no, "curr_hunts", self.settings.hunt_attempts):
+            raise TooMuchHuntingError
+        res = self.check_success(self.char.actual_stats)
         if res is False:
             # self.apply_consequences()
             pass
         return self.prey, res
     
-    def get_settings(self) -> dict:
-        query = select(Settings).where(Settings.area == "hunt")
-        settings: list[Settings] = self.select_many(query)
-        return {"hunt_attempts": i.value for i in settings if i.name == "hunt_attempts" or 0}
+    def get_settings(self) -> SettingsSnapshot:
+        return settings_registry.load()
 
     def validate_char(self):
+        """Early, friendlier errors, the hunt slot itself is only taken by reserve_attempt."""
         if self.char.is_frozen:
             raise CharacterFrozenException
         if self.char.is_dead:
             raise CharacterDeadException
-        if self.char.curr_hunts >= self.settings.get("hunt_attempts"):
-            raise TooMuchHuntingError
 
     def get_prey(self) -> Prey | None:
         res = roll()
         logger.debug(f"roll result for hunt: {res}")
-        season_q = select(Seasons).where(Seasons.is_active == True)  # noqa: E712
-        season: Seasons = self.safe_select_one(season_q)
-        if not season:
-            mod = 0
-        else:
-            mod = season.hunt_mod
-        query = (
-            select(Prey)
-            .join(PreyTerritory)
-            .where(
-                and_(
-                    Prey.rarity + mod >= res,
-                    PreyTerritory.territory == self.clan.no,
-                )
-            )
-        )
-        poss_prey = self.select_many(query)
+        return self._choose_prey(self._possible_prey(res))
+
+    def _possible_prey(self, res: int) -> list[Prey]:
+        season = reference_cache.get_active_season()
+        mod = season.hunt_mod if season else 0
+        return reference_cache.get_prey_for_roll(self.clan.no, res, mod)
+
+    @staticmethod
+    def _choose_prey(poss_prey: list[Prey]) -> Prey | None:
         try:
             prey = choice(poss_prey)
         except IndexError:
@@ -79,27 +71,34 @@ class Hunt(DbBrowser):
 
     def get_char(self) -> Characters:
         logger.debug(f'getting char data for name {self.char_name}')
-        query = select(Characters).where(Characters.name == self.char_name)
-        res = self.safe_select_one(query)
+        return self._check_char(self.safe_select_one(self._char_query()))
+
+    def _char_query(self):
+        # Reload even if the unit of work already holds the character, it may have been read
+        # before the character lock was taken.
+        return select(Characters).where(Characters.name == self.char_name).execution_options(populate_existing=True)
+
+    def _check_char(self, res: Characters | None) -> Characters:
         if not res:
             raise NoItemFoundDbError(f"Персонаж {self.char_name} не найден.")
         return res
 
     def get_clan(self) -> Clans:
         logger.debug(f"Getting cat territory for {self.territory}")
-        query = select(Clans).where(Clans.name == self.territory)
-        res = self.safe_select_one(query)
+        return self._check_clan(reference_cache.get_clan_by_name(self.territory))
+
+    def _check_clan(self, res: Clans | None) -> Clans:
         if not res:
             raise NoItemFoundDbError(f"Клан {self.territory} не найден.")
         return res
 
-    def check_success(self) -> bool:
+    def check_success(self, stats: dict[str, int]) -> bool:
         if not self.prey:
             return False
         stat = self.prey.stat.lower()
-        res = self.char.actual_stats["hunting"] + self.char.actual_stats[stat]
-        if self.prey.territory == self.char.clan_no:
-            res += self.char.actual_stats["faith"]
+        res = stats["hunting"] + stats[stat]
+        if self.clan.no == self.char.clan_no:
+            res += stats["faith"]
         logger.debug(f"Результат охоты: {res} против {self.prey.sum_required or 0}")
         if (self.prey.sum_required or 0) > res:
             logger.debug(f"Охота провалилась {self.prey.sum_required or 0} > {res}")
@@ -120,3 +119,29 @@ class Hunt(DbBrowser):
                 logger.debug(
                     f"Повторное ранение {self.prey.injury} для {self.char.name}, игнорирую"
                 )
+
+
+class AsyncHunt(Hunt):
+    """Async variant of Hunt for the bot handlers, all data is loaded in hunt()."""
+
+    def __init__(self, char_name: str, territory: str) -> None:
+        DbBrowser.__init__(self)
+        self.territory = territory.strip().capitalize()
+        self.char_name = char_name.strip().capitalize()
+        self.char_config = AsyncDbCharacterConfig()
+
+    async def hunt(self) -> tuple[Prey | None, bool]:
+        logger.debug(f'getting char data for name {self.char_name}')
+        self.char = self._check_char(await self.as_safe_select_one(self._char_query()))
+        self.clan = self.get_clan()
+        self.prey = self.get_prey()
+        self.settings = self.get_settings()
+        self.validate_char()
+        if not await self.char_config.reserve_attempt(self.char.no, "curr_hunts", self.settings.hunt_attempts):
+            raise TooMuchHuntingError
+        # The reservation holds the SQLite write lock, commit it before anything else runs.
+        if uow := UnitOfWork.current():
+            await uow.checkpoint()
+        stats = await self.char_config.get_stat_sheets([self.char])
+        res = self.check_success(stats[self.char.no])
+        return self.prey, res
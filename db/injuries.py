@@ -88,18 +88,16 @@ class DbInjuryConfigure(DbBrowser):
 
     def _add_injury_stats(self, name: str, penalties: dict):
         inj = self.get_injury_by_name(name=name)
-        for key, value in penalties.items():
-            query_stat = InjuryStat(issue=inj.no, stat=key, penalty=value)  # type: ignore
-            self.add(query_stat)
+        self.add_many(
+            InjuryStat(issue=inj.no, stat=key, penalty=value)  # type: ignore
+            for key, value in penalties.items()
+        )
 
     def _delete_injury_stats(self, no: int, to_delete: list[str]):
-        for stat in to_delete:
-            query = select(InjuryStat).where(
-                and_(InjuryStat.issue == no, InjuryStat.stat == stat)
-            )
-            with self.session as s:
-                stat_to_delete = s.exec(query).one()
-            self.delete(stat_to_delete)
+        query = select(InjuryStat).where(
+            and_(InjuryStat.issue == no, InjuryStat.stat.in_(to_delete))  # type: ignore
+        )
+        self.delete_many(self.select_many(query))
 
     def get_injury_by_no(self, no: int):
         query = select(Injuries).where(Injuries.no == no)
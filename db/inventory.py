@@ -1,34 +1,79 @@
-from sqlmodel import and_, select
+from sqlmodel import and_, func, select
 
-from db import CharacterInventory, DbBrowser, Session
+from db import CharacterInventory, DbBrowser, Herbs, Prey, Session
+
+
+class InventoryItem:
+    """
+    Inventory slot joined to the name of its item.
+
+    :var int no: CharacterInventory.no
+    :var str type: prey | herb
+    :var int item: prey or herb no
+    :var str|None name: item name, None if the item no longer exists
+    """
+
+    def __init__(self, no: int, type: str, item: int, name: str | None) -> None:
+        self.no = no
+        self.type = type
+        self.item = item
+        self.name = name
+
+
+def inventory_view_query(char_no: int):
+    return (
+        select(
+            CharacterInventory.no,
+            CharacterInventory.type,
+            CharacterInventory.item,
+            func.coalesce(Prey.name, Herbs.name),
+        )
+        .outerjoin(Prey, and_(CharacterInventory.type == "prey", Prey.no == CharacterInventory.item))
+        .outerjoin(Herbs, and_(CharacterInventory.type == "herb", Herbs.no == CharacterInventory.item))
+        .where(CharacterInventory.char_no == char_no)
+        .order_by(CharacterInventory.no)
+    )
 
 
 class InventoryManager(DbBrowser):
     session: Session
+    limit = 3
+    full_msg = "В инвентаре персонажа не может быть больше 3 предметов."
+    added_msg = "Предмет успешно добавлен в инвентарь персонажа."
 
     def __init__(self) -> None:
         super().__init__()
 
+    @staticmethod
+    def _inventory_query(char_no: int):
+        return select(CharacterInventory).where(CharacterInventory.char_no == char_no)
+
+    @staticmethod
+    def _item_query(char_no: int, item_id: int):
+        return select(CharacterInventory).where(
+            and_(
+                CharacterInventory.char_no == char_no,
+                CharacterInventory.item == item_id,
+            )
+        )
+
     def get_char_inventory(self, char_no: int):
-        query = select(CharacterInventory).where(CharacterInventory.char_no == char_no)
-        return self.select_many(query)
+        return self.select_many(self._inventory_query(char_no))
+
+    def get_inventory_view(self, char_no: int) -> list[InventoryItem]:
+        """Inventory of the character with item names, loaded with one query."""
+        return [InventoryItem(*row) for row in self.select_many(inventory_view_query(char_no))]
 
     def add_item(self, char_no: int, type: str, item_id: int) -> str:
         item = CharacterInventory(char_no=char_no, type=type, item=item_id)
-        if len(self.get_char_inventory(char_no)) >= 3:
-            return "В инвентаре персонажа не может быть больше 3 предметов."
+        if len(self.get_char_inventory(char_no)) >= self.limit:
+            return self.full_msg
         else:
             self.add(item)
-            return "Предмет успешно добавлен в инвентарь персонажа."
+            return self.added_msg
 
     def remove_item(self, char_no: int, item_id: int) -> bool:
-        query = select(CharacterInventory).where(
-            and_(
-                CharacterInventory.char_no == char_no,
-                CharacterInventory.item == item_id,
-            )
-        )
-        item = self.safe_select_one(query)
+        item = self.safe_select_one(self._item_query(char_no, item_id))
         if item:
             self.delete(item)
             return True
@@ -36,11 +81,43 @@ class InventoryManager(DbBrowser):
             return False
 
     def clear_inventory(self, char_no: int) -> bool:
-        query = select(CharacterInventory).where(CharacterInventory.char_no == char_no)
-        items = self.select_many(query)
+        items = self.get_char_inventory(char_no)
+        if items:
+            self.delete_many(items)
+            return True
+        else:
+            return False
+
+
+class AsyncInventoryManager(DbBrowser):
+    """Async variant of InventoryManager for the bot handlers."""
+
+    async def get_char_inventory(self, char_no: int):
+        return await self.as_select_many(InventoryManager._inventory_query(char_no))
+
+    async def get_inventory_view(self, char_no: int) -> list[InventoryItem]:
+        return [InventoryItem(*row) for row in await self.as_select_many(inventory_view_query(char_no))]
+
+    async def add_item(self, char_no: int, type: str, item_id: int) -> str:
+        item = CharacterInventory(char_no=char_no, type=type, item=item_id)
+        if len(await self.get_char_inventory(char_no)) >= InventoryManager.limit:
+            return InventoryManager.full_msg
+        else:
+            await self.as_add(item)
+            return InventoryManager.added_msg
+
+    async def remove_item(self, char_no: int, item_id: int) -> bool:
+        item = await self.as_safe_select_one(InventoryManager._item_query(char_no, item_id))
+        if item:
+            await self.as_delete(item)
+            return True
+        else:
+            return False
+
+    async def clear_inventory(self, char_no: int) -> bool:
+        items = await self.get_char_inventory(char_no)
         if items:
-            for item in items:
-                self.delete(item)
+            await self.as_delete_many(items)
             return True
         else:
             return False
@@ -0,0 +1,88 @@
+from threading import Lock
+from time import monotonic
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from db import Players, Session, as_engine, engine
+
+
+class Permissions:
+    """
+    Access flags of one player.
+
+    :var int chat_id: telegram chat id.
+    :var str username: telegram username.
+    :var bool is_banned:
+    :var bool is_admin:
+    :var bool is_superuser:
+    """
+
+    def __init__(self, chat_id: int, username: str, is_banned: bool, is_admin: bool, is_superuser: bool) -> None:
+        self.chat_id = chat_id
+        self.username = username
+        self.is_banned = is_banned
+        self.is_admin = is_admin
+        self.is_superuser = is_superuser
+
+    @property
+    def is_staff(self) -> bool:
+        return self.is_admin or self.is_superuser
+
+
+class PermissionCache:
+    """
+    Player permissions by chat_id, kept for ttl seconds or until invalidated.
+
+    Unknown chat ids are cached as None as well, registering a player invalidates them.
+
+    :var float ttl: seconds an entry stays valid
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: dict[int, tuple[float, Permissions | None]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _query(chat_id: int):
+        return select(
+            Players.chat_id, Players.username, Players.is_banned, Players.is_admin, Players.is_superuser
+        ).where(Players.chat_id == chat_id)
+
+    def _cached(self, chat_id: int) -> tuple[bool, Permissions | None]:
+        entry = self._entries.get(chat_id)
+        if entry and monotonic() - entry[0] < self.ttl:
+            return True, entry[1]
+        return False, None
+
+    def _store(self, chat_id: int, row) -> Permissions | None:
+        permissions = Permissions(*row) if row else None
+        with self._lock:
+            self._entries[chat_id] = (monotonic(), permissions)
+        return permissions
+
+    def get(self, chat_id: int) -> Permissions | None:
+        found, permissions = self._cached(chat_id)
+        if found:
+            return permissions
+        with Session(engine) as s:
+            return self._store(chat_id, s.exec(self._query(chat_id)).first())
+
+    async def as_get(self, chat_id: int) -> Permissions | None:
+        found, permissions = self._cached(chat_id)
+        if found:
+            return permissions
+        async with AsyncSession(as_engine) as s:
+            return self._store(chat_id, (await s.exec(self._query(chat_id))).first())
+
+    def invalidate(self, *chat_ids: int) -> None:
+        """Drop the given chat ids, or every entry when none are given."""
+        with self._lock:
+            if not chat_ids:
+                self._entries.clear()
+            for chat_id in chat_ids:
+                self._entries.pop(chat_id, None)
+
+
+permission_cache = PermissionCache(ttl=300)
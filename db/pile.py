@@ -1,8 +1,12 @@
-from sqlmodel import Session, and_, select
+from datetime import datetime, timedelta
 
-from db import PreyPile, Prey, DbBrowser, Clans
+from sqlmodel import (Integer, Session, and_, case, cast, delete, func, literal,
+                      or_, select)
+
+from db import PreyPile, Prey, DbBrowser, Clans, settings_registry
+from db.cache import reference_cache
 from db.clans import DbClanConfig
-from db.prey import DbPreyConfig
+from db.prey import AsyncDbPreyConfig, DbPreyConfig
 
 
 class PreyPileConfig(DbBrowser):
@@ -32,13 +36,12 @@ class PreyPileConfig(DbBrowser):
         prey = self._get_prey(prey)
         new_pile = PreyPile(clan=clan.no, prey=prey.no)
         self.add(new_pile)
-        return f"Дичь {prey.name} добавлена в кучу клана {clan.name}"
+        return self._added_msg(clan, prey)
     
     def get_from_pile(self, clan: int | str| Clans, prey: int | str | Prey):
         clan = self._get_clan(clan)
         prey = self._get_prey(prey)
-        query = select(PreyPile).where(and_(PreyPile.clan == clan.no, PreyPile.prey == prey.no))
-        item: PreyPile = self.safe_select_one(query)
+        item: PreyPile = self.safe_select_one(self._pile_item_query(clan, prey))
         if item:
             self.delete(item)
             return item
@@ -46,5 +49,84 @@ class PreyPileConfig(DbBrowser):
     
     def get_prey_for_clan(self, clan: int | str | Clans):
         clan = self._get_clan(clan)
-        query = select(Prey).join(PreyPile, onclause= Prey.no == PreyPile.prey).where(PreyPile.clan == clan.no)
-        return self.select_many(query)
+        return self.select_many(self._clan_prey_query(clan))
+
+    @staticmethod
+    def _added_msg(clan: Clans, prey: Prey) -> str:
+        return f"Дичь {prey.name} добавлена в кучу клана {clan.name}"
+
+    @staticmethod
+    def _pile_item_query(clan: Clans, prey: Prey):
+        return select(PreyPile).where(and_(PreyPile.clan == clan.no, PreyPile.prey == prey.no))
+
+    @staticmethod
+    def _clan_prey_query(clan: Clans):
+        return select(Prey).join(PreyPile, onclause=Prey.no == PreyPile.prey).where(PreyPile.clan == clan.no)
+
+    def cut_pile(self) -> int:
+        """
+        Delete the oldest share of every clan's pile and prey older than the clan's max age.
+
+        :return: number of deleted pile rows
+        """
+        settings = settings_registry.load()
+        default_share, shares, max_ages = settings.pile_cut_share, settings.pile_cut_shares, settings.pile_max_ages
+        ranked = select(
+            PreyPile.no,
+            PreyPile.clan,
+            PreyPile.date_added,
+            func.row_number().over(
+                partition_by=PreyPile.clan, order_by=(PreyPile.date_added, PreyPile.no)
+            ).label("pos"),
+            func.count().over(partition_by=PreyPile.clan).label("total"),
+        ).subquery()
+        share = case(shares, value=ranked.c.clan, else_=default_share) if shares else literal(default_share)
+        condition = ranked.c.pos <= cast(ranked.c.total * share, Integer)
+        if max_ages:
+            now = datetime.now()
+            cutoff = case(
+                {clan: now - timedelta(days=days) for clan, days in max_ages.items()},
+                value=ranked.c.clan,
+            )
+            condition = or_(condition, ranked.c.date_added < cutoff)
+        query = delete(PreyPile).where(PreyPile.no.in_(select(ranked.c.no).where(condition)))  # type: ignore
+        with self.transaction() as s:
+            return s.exec(query.execution_options(synchronize_session=False)).rowcount  # type: ignore
+
+
+class AsyncPreyPileConfig(DbBrowser):
+    """Async variant of PreyPileConfig for the bot handlers."""
+
+    async def _get_prey(self, prey: int | str | Prey) -> Prey:
+        if isinstance(prey, int):
+            prey = await AsyncDbPreyConfig().get_prey_by_no(prey)
+        elif isinstance(prey, str):
+            prey = await AsyncDbPreyConfig().get_prey_by_name(prey)
+        return prey
+
+    async def _get_clan(self, clan: int | str | Clans) -> Clans:
+        if isinstance(clan, int):
+            clan = reference_cache.get_clan_by_no(clan)
+        elif isinstance(clan, str):
+            clan = reference_cache.get_clan_by_name(clan)
+        return clan
+
+    async def add_to_pile(self, clan: int | str | Clans, prey: int | str | Prey):
+        clan = await self._get_clan(clan)
+        prey = await self._get_prey(prey)
+        new_pile = PreyPile(clan=clan.no, prey=prey.no)
+        await self.as_add(new_pile)
+        return PreyPileConfig._added_msg(clan, prey)
+
+    async def get_from_pile(self, clan: int | str | Clans, prey: int | str | Prey):
+        clan = await self._get_clan(clan)
+        prey = await self._get_prey(prey)
+        item: PreyPile = await self.as_safe_select_one(PreyPileConfig._pile_item_query(clan, prey))
+        if item:
+            await self.as_delete(item)
+            return item
+        return None
+
+    async def get_prey_for_clan(self, clan: int | str | Clans):
+        clan = await self._get_clan(clan)
+        return await self.as_select_many(PreyPileConfig._clan_prey_query(clan))
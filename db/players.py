@@ -2,6 +2,7 @@ from sqlmodel import Session, and_, select
 
 from db import Characters, DbBrowser, Players
 from db.characters import DbCharacterConfig
+from db.permissions import Permissions, permission_cache
 
 
 class DbPlayerConfig(DbBrowser):
@@ -18,14 +19,24 @@ class DbPlayerConfig(DbBrowser):
         username: str,
         first_name: str | None = None,
         last_name: str | None = None,
-    ):
-        new_player = Players(
+    ) -> Players:
+        new_player = self._new_player(chat_id, username, first_name, last_name)
+        self.after_commit(lambda: permission_cache.invalidate(chat_id))
+        self.add(new_player)
+        return new_player
+
+    @staticmethod
+    def _new_player(chat_id: int, username: str, first_name: str | None, last_name: str | None) -> Players:
+        return Players(
             chat_id=chat_id,
             username=username,
             first_name=first_name,
             last_name=last_name,
         )
-        self.add(new_player)
+
+    def add_admins(self, ids: list[str], usernames: list[str]):
+        self.after_commit(lambda: permission_cache.invalidate(*map(int, ids)))
+        super().add_admins(ids, usernames)
 
     def ban_player(self, username: str) -> tuple[bool, str]:
         query = select(Players).where(Players.username == username)
@@ -34,6 +45,7 @@ class DbPlayerConfig(DbBrowser):
             return False, 'Игрок с таким именем не найден!'
         if not player.is_superuser and not player.is_admin:
             player.is_banned = True
+            self.after_commit(lambda: permission_cache.invalidate(player.chat_id))
             self.add(player)
             query = select(Characters).where(
                 Characters.player_chat_id == player.chat_id
@@ -53,6 +65,7 @@ class DbPlayerConfig(DbBrowser):
         if not player:
             return False, 'Забаненный игрок с таким именем не найден!'
         player.is_banned = False
+        self.after_commit(lambda: permission_cache.invalidate(player.chat_id))
         self.add(player)
         query = select(Characters).where(Characters.player_chat_id == player.chat_id)
         with self.session as s:
@@ -61,12 +74,11 @@ class DbPlayerConfig(DbBrowser):
         return True, f"Игрок {username} разбанен."
 
     def check_if_user_is_admin(self, chat_id) -> bool:
-        query = select(Players).where(Players.chat_id == chat_id)
-        with self.session as s:
-            player = s.exec(query).one()
-        if player.is_admin or player.is_superuser:
-            return True
-        return False
+        return self._is_staff(permission_cache.get(chat_id))
+
+    @staticmethod
+    def _is_staff(permissions: Permissions | None) -> bool:
+        return bool(permissions and permissions.is_staff)
 
     def get_player_by_username(self, username: str) -> Players | None:
         query = select(Players).where(Players.username == username)
@@ -78,6 +90,7 @@ class DbPlayerConfig(DbBrowser):
         if not player:
             return False, 'Игрок с таким именем не найден!'
         player.is_admin = flag
+        self.after_commit(lambda: permission_cache.invalidate(player.chat_id))
         self.add(player)
         return True, f'Игрок {username} {"повышен" if flag is True else "уволен"} успешно'
 
@@ -86,9 +99,34 @@ class DbPlayerConfig(DbBrowser):
         return self.select_many(query)
     
     def get_player_by_id(self, chat_id: int) -> Players | None:
-        query = select(Players).where(Players.chat_id == chat_id)
-        return self.safe_select_one(query)
+        return self.safe_select_one(self._by_id_query(chat_id))
+
+    @staticmethod
+    def _by_id_query(chat_id: int):
+        return select(Players).where(Players.chat_id == chat_id)
 
     def get_all_banned(self) -> list[Players]:
         query = select(Players).where(Players.is_banned == True)  #noqa: E712
         return self.select_many(query)
+
+
+class AsyncDbPlayerConfig(DbBrowser):
+    """Async variant of DbPlayerConfig for the bot handlers."""
+
+    async def add_player(
+        self,
+        chat_id: int,
+        username: str,
+        first_name: str | None = None,
+        last_name: str | None = None,
+    ) -> Players:
+        new_player = DbPlayerConfig._new_player(chat_id, username, first_name, last_name)
+        self.as_after_commit(lambda: permission_cache.invalidate(chat_id))
+        await self.as_add(new_player)
+        return new_player
+
+    async def check_if_user_is_admin(self, chat_id) -> bool:
+        return DbPlayerConfig._is_staff(await permission_cache.as_get(chat_id))
+
+    async def get_player_by_id(self, chat_id: int) -> Players | None:
+        return await self.as_safe_select_one(DbPlayerConfig._by_id_query(chat_id))
@@ -3,7 +3,9 @@ from typing import Any
 from sqlmodel import Session, and_, select
 
 from db import Clans, DbBrowser, Prey, PreyTerritory
+from db.cache import reference_cache
 from db.clans import DbClanConfig
+from exceptions import NoItemFoundDbError
 
 
 class DbPreyConfig(DbBrowser):
@@ -12,6 +14,10 @@ class DbPreyConfig(DbBrowser):
     def __init__(self) -> None:
         super().__init__()
 
+    def commit(self):
+        self.after_commit(reference_cache.invalidate)
+        super().commit()
+
     def refresh(self):
         self.session.refresh(Prey)
         self.session.refresh(PreyTerritory)
@@ -53,9 +59,9 @@ class DbPreyConfig(DbBrowser):
         added_prey: Prey = self.select_one(
             select(Prey).where(Prey.name == new_prey.name)
         )
-        for i in territories:
-            new_terr_link = PreyTerritory(prey=added_prey.no, territory=i)
-            self.add(new_terr_link)
+        self.add_many(
+            PreyTerritory(prey=added_prey.no, territory=i) for i in territories
+        )
 
     def edit_prey_by_name(self, name: str, params: dict[str, Any]):
         prey = self.get_prey_by_name(name)
@@ -87,14 +93,30 @@ class DbPreyConfig(DbBrowser):
     def reset_territories(self, prey: Prey, terr: str):
         query = select(PreyTerritory).where(PreyTerritory.prey == prey.no)
         old_terr = self.select_many(query)
-        for i in old_terr:
-            self.delete(i)
-        new_terr = terr.split(";") if terr else []
-        for i in new_terr:
+        new_terr = []
+        for i in terr.split(";") if terr else []:
             try:
                 int(i)
                 territory = DbClanConfig().get_clan_by_no(i)
             except ValueError:
                 territory = DbClanConfig().get_clan_by_name(i)
-            db_terr = PreyTerritory(prey=prey.no, territory=territory.no)
-            self.add(db_terr)
+            new_terr.append(PreyTerritory(prey=prey.no, territory=territory.no))
+        with self.transaction() as s:
+            for i in old_terr:
+                s.delete(i)
+            s.flush()
+            s.add_all(new_terr)
+
+
+class AsyncDbPreyConfig(DbBrowser):
+    """Async variant of DbPreyConfig for the bot handlers."""
+
+    async def get_prey_by_name(self, name: str) -> Prey:
+        if not (prey := reference_cache.get_prey_by_name(name)):
+            raise NoItemFoundDbError(f"Дичь {name} не найдена.")
+        return prey
+
+    async def get_prey_by_no(self, no: int) -> Prey:
+        if not (prey := reference_cache.get_prey_by_no(no)):
+            raise NoItemFoundDbError(f"Дичь {no} не найдена.")
+        return prey
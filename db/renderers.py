@@ -0,0 +1,70 @@
+from collections import defaultdict
+from typing import Iterable
+
+from sqlmodel import SQLModel, func, select
+
+from db import (Characters, Clans, DbBrowser, Diseases, Herbs, Injuries, Prey,
+                PreyPile, PreyTerritory)
+from db.characters import DbCharacterConfig
+
+
+class Renderer(DbBrowser):
+    """Formats lists of entities, loading every related table with one IN query."""
+
+    def _names(self, table: type[SQLModel], nos: Iterable[int | None]) -> dict[int, str]:
+        nos = {i for i in nos if i is not None}
+        if not nos:
+            return {}
+        return dict(self.select_many(select(table.no, table.name).where(table.no.in_(nos))))  # type: ignore
+
+    def render_prey(self, prey: list[Prey]) -> list[str]:
+        territories: dict[int, list[str]] = defaultdict(list)
+        if prey:
+            query = (
+                select(PreyTerritory.prey, Clans.name)
+                .join(Clans, Clans.no == PreyTerritory.territory)
+                .where(PreyTerritory.prey.in_([i.no for i in prey]))  # type: ignore
+                .order_by(PreyTerritory.no)
+            )
+            for prey_no, name in self.select_many(query):
+                territories[prey_no].append(name)
+        injuries = self._names(Injuries, (i.injury for i in prey))
+        return [i.render(territories[i.no], injuries.get(i.injury)) for i in prey]
+
+    def render_clans(self, clans: list[Clans]) -> list[str]:
+        prey: dict[int, list[str]] = defaultdict(list)
+        piles: dict[int, int] = {}
+        if clans:
+            nos = [clan.no for clan in clans]
+            query = (
+                select(PreyTerritory.territory, Prey.name)
+                .join(Prey, Prey.no == PreyTerritory.prey)
+                .where(PreyTerritory.territory.in_(nos))  # type: ignore
+                .order_by(PreyTerritory.no)
+            )
+            for territory, name in self.select_many(query):
+                prey[territory].append(name)
+            query = (
+                select(PreyPile.clan, func.sum(Prey.amount))
+                .join(Prey, Prey.no == PreyPile.prey)
+                .where(PreyPile.clan.in_(nos))  # type: ignore
+                .group_by(PreyPile.clan)
+            )
+            piles = dict(self.select_many(query))
+        leaders = self._names(Characters, (clan.leader for clan in clans))
+        return [
+            clan.render(leaders.get(clan.leader), prey[clan.no], piles.get(clan.no, 0))
+            for clan in clans
+        ]
+
+    def render_herbs(self, herbs: list[Herbs]) -> list[str]:
+        clans = self._names(Clans, (herb.territory for herb in herbs))
+        diseases = self._names(Diseases, (herb.disease for herb in herbs))
+        injuries = self._names(Injuries, (herb.injury for herb in herbs))
+        return [
+            herb.render(clans.get(herb.territory), diseases.get(herb.disease), injuries.get(herb.injury))
+            for herb in herbs
+        ]
+
+    def render_characters(self, chars: list[Characters]) -> list[str]:
+        return DbCharacterConfig().render_chars(chars)
@@ -1,6 +1,7 @@
 from sqlmodel import Session, select
 
 from db import Seasons, DbBrowser
+from db.cache import reference_cache
 
 
 class SeasonsConfig(DbBrowser):
@@ -9,6 +10,10 @@ class SeasonsConfig(DbBrowser):
     def __init__(self):
         super().__init__()
     
+    def commit(self):
+        self.after_commit(reference_cache.invalidate)
+        super().commit()
+
     def set_next_season(self) -> None:
         query_curr = select(Seasons).where(Seasons.is_active == True)  #noqa: E712
         curr_season: Seasons = self.select_one(query_curr)
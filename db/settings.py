@@ -1,12 +1,16 @@
 from sqlmodel import select
 
-from db import Settings, DbBrowser, Characters
+from db import Settings, DbBrowser, settings_registry
 
 
 class SettingConfig(DbBrowser):
 
     def __init__(self):
         super().__init__()
+
+    def commit(self):
+        self.after_commit(settings_registry.invalidate)
+        super().commit()
     
     def set_setting(self, name: str, value: str):
         old: Settings = self.select_one(select(Settings).where(Settings.name == name))
@@ -14,13 +18,21 @@ class SettingConfig(DbBrowser):
         self.add(old)
     
     def get_setting(self, name: str):
-        return self.select_one(select(Settings).where(Settings.name == name)).value()
+        return settings_registry.load().raw[name]
     
     def insert_new_setting(self, params: dict[str, str]):
         return self.add(Settings(**params))
 
-    def curr_hunger_pens(self):
-        return Characters._get_hunger_pen()
+    def save_setting(self, name: str, value: str):
+        setting: Settings | None = self.safe_select_one(select(Settings).where(Settings.name == name))
+        if setting:
+            setting.value = value
+        else:
+            setting = Settings(name=name, value=value)
+        self.add(setting)
+
+    def curr_hunger_pens(self) -> dict[int, int]:
+        return settings_registry.load().hunger_pens
     
     def get_all_settings(self):
         return self.select_many(select(Settings))
\ No newline at end of file
@@ -1,10 +1,12 @@
 SETTINGS = [
     {'name': 'hunt_attempts', 'value': '5'},
+    {'name': 'herb_attempts', 'value': '3'},
     {'name': 'max_hunger', 'value': '3'},
     {'name': 'hunger_pen_1', 'value': '1'},
     {'name': 'hunger_pen_2', 'value': '3'},
     {'name': 'hunger_pen_3', 'value': '5'},
-    {'name': 'max_age', 'value': '150'}
+    {'name': 'max_age', 'value': '150'},
+    {'name': 'pile_cut_share', 'value': '0.5'},
 ]
 
 SEASONS = [
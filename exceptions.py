@@ -41,3 +41,11 @@ class NotRealClanError(Exception):
 
 class TooMuchHuntingError(Exception):
     pass
+
+
+class TooMuchGatheringError(Exception):
+    pass
+
+
+class MixedSessionWriteError(Exception):
+    pass
@@ -1,24 +1,32 @@
 import asyncio
 import os
+from contextvars import Context
+from inspect import iscoroutinefunction
 # from datetime import datetime as dt
 
+from apscheduler.job import Job
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from dotenv import load_dotenv
-from sqlmodel import select, and_
-from telegram import Bot
+from sqlmodel import and_, or_, select, update
 
-from db import Ages, Characters, DbBrowser, PreyPile, Settings, engine, SQLModel
+from bot.notifications import notifications
+from db import Characters, DbBrowser, engine, settings_registry, SQLModel
+from db.age import AgeConfig
+from db.cache import reference_cache
+from db.pile import PreyPileConfig
 from db.seasons import SeasonsConfig
 from logs.logs import schedule_logger as logger
 
 load_dotenv()
 db = DbBrowser()
-active_chars = select(Characters).where(and_(Characters.is_dead == False, Characters.is_frozen == False))  #noqa: E712
-scheduler = BackgroundScheduler()
+active_filter = and_(Characters.is_dead == False, Characters.is_frozen == False)  #noqa: E712
+active_chars = select(Characters).where(active_filter)
+scheduler = AsyncIOScheduler()
 
 
 def create_schedules() -> None:
+    """Starts the scheduler on the running event loop."""
     logger.debug("schedule creation start")
     store = SQLAlchemyJobStore(engine=engine, metadata=SQLModel.metadata)    
     scheduler.add_jobstore(store)
@@ -33,14 +41,16 @@ def create_schedules() -> None:
     logger.debug("Schedule creation end")
 
 
-def check_nutrition():
-    loop = asyncio.new_event_loop()
-    loop.run_until_complete(_check_nutrition())
+async def run_job(job: Job) -> None:
+    """
+    Runs the job now and waits for it.
 
-
-def age_cats():
-    loop = asyncio.new_event_loop()
-    loop.run_until_complete(_age_cats())
+    The job gets an empty context, so it never joins the unit of work of the calling handler.
+    """
+    if iscoroutinefunction(job.func):
+        await asyncio.create_task(job.func(*job.args, **job.kwargs), context=Context())
+    else:
+        await asyncio.get_running_loop().run_in_executor(None, lambda: job.func(*job.args, **job.kwargs))
 
 
 def advance_seasons():
@@ -50,77 +60,86 @@ def advance_seasons():
 
 
 def cut_pile():
-    db = DbBrowser()
     logger.info("Pile cutting start")
-    piles: list[PreyPile] = db.select_many(select(PreyPile))
-    clan_list = {i.clan for i in piles}
-    for clan in clan_list:
-        logger.info(f"cutting for clan no {clan}")
-        prey_list = sorted([i for i in piles if i.clan == clan], key=lambda v: v.date_added)
-        old = prey_list[:len(prey_list)//2]
-        for i in old:
-            db.delete(i)
-    logger.info("Pile cutting end")
-
-
-async def _check_nutrition():
+    deleted = PreyPileConfig().cut_pile()
+    logger.info(f"Pile cutting end, removed {deleted}")
+
+
+async def check_nutrition():
     logger.info("Nutrition check start")
-    db = DbBrowser()
-    bot = Bot(token=os.getenv("TOKEN"))
-    chars: list[Characters] = db.select_many(active_chars)
-    max_hunger: Settings = db.select_one(select(Settings).where(Settings.name == "max_hunger"))
-    for char in chars:
-        age_q = select(Ages).where(Ages.max_age > char.age).order_by(Ages.max_age)
-        age: Ages = db.safe_select_one(age_q)
-        if age.food_req > char.nutrition:
-            char.hunger += 1
-            if char.hunger > int(max_hunger.value):
-                char.is_dead = True
-                db.add(char)
-                logger.info(f"Character {char.name} died of hunger UwU")
-                await bot.send_message(
-                    char.player_chat_id,
-                    f"Ваш персонаж {char.name} умер от голода!"
-                )
-                continue
-            db.add(char)
-            logger.debug(f"Hunger added for {char.name} new {char.hunger}")            
-        if char.nutrition >= age.food_req and char.hunger != 0:
-            logger.debug(f"Hunger reset for {char.name}")
-            char.hunger = 0
-            db.add(char)
+    starved = await asyncio.to_thread(_check_nutrition)
+    for char in starved:
+        logger.info(f"Character {char.name} died of hunger UwU")
+        notifications.send(char.player_chat_id, f"Ваш персонаж {char.name} умер от голода!")
     logger.info("Nutrition check end")
 
 
-async def _age_cats():
-    logger.info("Age start")
-    bot = Bot(token=os.getenv("TOKEN"))
+def _check_nutrition() -> list[Characters]:
     db = DbBrowser()
-    admin_chat = os.getenv("ADMIN_CHAT")
-    ages = select(Ages)
     chars: list[Characters] = db.select_many(active_chars)
-    ages: list[Ages] = db.select_many(ages)
-    breakpoints = [age.max_age for age in ages]
-    max_age: Settings = db.select_one(select(Settings).where(Settings.name == "max_age"))
+    max_hunger = settings_registry.load().max_hunger
+    brackets = AgeConfig().get_brackets()
+    hungry, starved, fed = [], [], []
     for char in chars:
-        char.age += 2
-        if char.age in breakpoints:
-            if char.age >= int(max_age.value):
-                logger.info(f"Char {char.name} died of old age.")
-                char.is_dead = True
-                await bot.send_message(char.player_chat_id, f"Ваш персонаж {char.name} умер от старости.")
+        age = brackets.get(char.age)
+        if age.food_req > char.nutrition:
+            if char.hunger + 1 > max_hunger:
+                starved.append(char)
             else:
-                logger.info(f"Char {char.name} grown to {char.age} moons.")
-                await bot.send_message(admin_chat, f"Персонаж {char.name} вырос до {char.age} лун! Нужно сменить ему характеристики!")
-        db.add(char)
+                hungry.append(char)
+        elif char.hunger != 0:
+            fed.append(char)
+    with db.transaction() as s:
+        for group, values in (
+            (hungry, {"hunger": Characters.hunger + 1}),
+            (starved, {"hunger": Characters.hunger + 1, "is_dead": True}),
+            (fed, {"hunger": 0}),
+        ):
+            if group:
+                s.exec(update(Characters).where(Characters.no.in_([char.no for char in group])).values(**values))  # type: ignore
+    logger.debug(f"Hunger added for {len(hungry)}, reset for {len(fed)}, starved {len(starved)}")
+    return starved
+
+
+async def age_cats():
+    logger.info("Age start")
+    grown, dead = await asyncio.to_thread(_age_cats)
+    digest = notifications.digest(os.getenv("ADMIN_CHAT"), "Персонажи выросли, нужно сменить им характеристики:")
+    for char in grown:
+        if char in dead:
+            logger.info(f"Char {char.name} died of old age.")
+            notifications.send(char.player_chat_id, f"Ваш персонаж {char.name} умер от старости.")
+        else:
+            logger.info(f"Char {char.name} grown to {char.age} moons.")
+            digest.add(f"{char.name} - {char.age} лун")
+    digest.send()
     logger.info("Age end")
 
 
+def _age_cats() -> tuple[list[Characters], list[Characters]]:
+    """Ages active characters by two moons, returns the ones that reached a new age and the ones that died."""
+    db = DbBrowser()
+    breakpoints = [age.max_age for age in reference_cache.get_ages()]
+    max_age = settings_registry.load().max_age
+    with db.transaction() as s:
+        grown: list[Characters] = s.exec(
+            active_chars.where(Characters.age.in_([i - 2 for i in breakpoints]))  # type: ignore
+        ).all()
+        aged = s.exec(update(Characters).where(active_filter).values(age=Characters.age + 2)).rowcount  # type: ignore
+        dead = [char for char in grown if char.age >= max_age]
+        if dead:
+            s.exec(update(Characters).where(Characters.no.in_([char.no for char in dead])).values(is_dead=True))  # type: ignore
+    logger.debug(f"Aged {aged} characters")
+    return list(grown), dead
+
+
 def reset_hunt_attempts():
-    logger.info("Hunt attemps start")
+    logger.info("Hunt and herb attempts start")
     db = DbBrowser()
-    chars: list[Characters] = db.select_many(active_chars)
-    for char in chars:
-        char.curr_hunts = 0
-        db.add(char)
-    logger.info("Hunt attemps end")
+    reset = db.update(
+        update(Characters)
+        .where(and_(active_filter, or_(Characters.curr_hunts != 0, Characters.curr_herbs != 0)))
+        .values(curr_hunts=0, curr_herbs=0)
+    )
+    logger.debug(f"Hunt and herb attempts reset for {reset} characters")
+    logger.info("Hunt and herb attempts end")
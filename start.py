@@ -4,10 +4,11 @@ from dotenv import load_dotenv
 
 
 from bot.main import bot_main
-from db import DbBrowser, create_tables
+from db import create_tables
+from db.cache import reference_cache
+from db.players import DbPlayerConfig
 from debug_tables import create_test_data
 from logs.logs import main_logger as logger
-from schedule import create_schedules
 
 load_dotenv()
 
@@ -18,9 +19,8 @@ def main():
     admin_names = os.getenv("ADMIN_NAMES", "").split(",")
     create_tables()
     print("Tables created!")
-    create_schedules()
-    print("Jobs scheduled!")
-    DbBrowser().add_admins(admin_ids, admin_names)
+    reference_cache.load()
+    DbPlayerConfig().add_admins(admin_ids, admin_names)
     if os.getenv("TEST_MODE"):
         create_test_data()
         print("Test data added!")
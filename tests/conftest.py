@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+import pytest
+
+
+def pytest_sessionstart(session: pytest.Session) -> None:
+    # The engines and log files use paths relative to the working directory, so it is switched
+    # before the test modules import anything from the project.
+    os.chdir(tempfile.mkdtemp(prefix="catbot-tests-"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema() -> None:
+    from db import create_tables
+
+    create_tables()
@@ -0,0 +1,122 @@
+import asyncio
+from itertools import count
+from types import SimpleNamespace
+
+import pytest
+from sqlmodel import select
+
+import bot.main
+from db import Characters, DbBrowser, Players, UnitOfWork, as_engine, settings_registry
+from db.settings import SettingConfig
+
+TERRITORY = "Клан добрых"
+TOO_MANY = "Этот персонаж уже достаочно поохотился в этом сезоне!"
+_ids = count(7000)
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+        self.on_send = None
+
+    async def send_message(self, chat_id: int, text: str | None = None, **kwargs) -> None:
+        self.sent.append((chat_id, text))  # type: ignore
+        if self.on_send:
+            await self.on_send()
+
+
+def make_players(monkeypatch: pytest.MonkeyPatch, players: int, cats: int) -> dict[int, list[Characters]]:
+    """players players with cats cats each, all of them allowed to hunt from their own chat."""
+    db = DbBrowser()
+    chat_ids = [next(_ids) for _ in range(players)]
+    monkeypatch.setenv("GROUPS", ",".join(map(str, chat_ids)))
+    db.add_many(Players(chat_id=chat_id, username=f"u{chat_id}") for chat_id in chat_ids)
+    db.add_many(
+        Characters(name=f"Кот{chat_id}{i}", player_chat_id=chat_id, age=20, hunting=5)
+        for chat_id in chat_ids
+        for i in range(cats)
+    )
+    return {
+        chat_id: db.select_many(select(Characters).where(Characters.player_chat_id == chat_id))
+        for chat_id in chat_ids
+    }
+
+
+def hunt_update(cat: Characters):
+    user = SimpleNamespace(id=cat.player_chat_id, username=f"u{cat.player_chat_id}", first_name="", last_name="")
+    return SimpleNamespace(
+        message=SimpleNamespace(text=f"/hunt {cat.name}\n{TERRITORY}", from_user=user, id=1),
+        effective_chat=SimpleNamespace(id=cat.player_chat_id),
+        effective_user=user,
+    )
+
+
+def context(fake_bot: FakeBot):
+    return SimpleNamespace(bot=fake_bot, user_data={}, chat_data={}, application=SimpleNamespace(user_data={}))
+
+
+def curr_hunts(players: dict[int, list[Characters]]) -> dict[str, int]:
+    cats = [cat.no for chat_cats in players.values() for cat in chat_cats]
+    query = select(Characters.name, Characters.curr_hunts).where(Characters.no.in_(cats))  # type: ignore
+    return dict(DbBrowser().select_many(query))
+
+
+async def run(*coros):
+    try:
+        return await asyncio.gather(*coros)
+    finally:
+        await as_engine.dispose()
+
+
+def test_hunts_of_several_players_stop_at_limit(monkeypatch):
+    """Every hunt goes through the command dispatcher, under its per-user and per-character locks."""
+    limit = settings_registry.load().hunt_attempts
+    players = make_players(monkeypatch, players=3, cats=2)
+    fake_bot = FakeBot()
+    hunts = [
+        bot.main.command_handler(hunt_update(cat), context(fake_bot))
+        for cats in players.values()
+        for cat in cats
+        for _ in range(limit + 2)
+    ]
+    asyncio.run(run(*hunts))
+    assert curr_hunts(players) == {cat.name: limit for cats in players.values() for cat in cats}
+    for chat_id, cats in players.items():
+        assert [text for chat, text in fake_bot.sent if chat == chat_id].count(TOO_MANY) == 2 * len(cats)
+
+
+def test_sync_write_while_hunt_replies(monkeypatch):
+    """
+    The first hunt reply only returns once a sync settings write went through.
+
+    If the hunt still held the SQLite write lock during its reply, the write would fail with
+    "database is locked" after busy_timeout.
+    """
+    limit = settings_registry.load().hunt_attempts
+    players = make_players(monkeypatch, players=2, cats=1)
+    fake_bot = FakeBot()
+    replying, written = asyncio.Event(), asyncio.Event()
+
+    async def first_reply_waits() -> None:
+        if not replying.is_set():
+            replying.set()
+            await written.wait()
+
+    async def admin_write() -> None:
+        await replying.wait()
+        try:
+            async with UnitOfWork():
+                await asyncio.to_thread(SettingConfig().set_setting, "max_hunger", "4")
+        finally:
+            written.set()
+
+    fake_bot.on_send = first_reply_waits
+    hunts = [
+        bot.main.command_handler(hunt_update(cat), context(fake_bot))
+        for cats in players.values()
+        for cat in cats
+        for _ in range(limit + 1)
+    ]
+    asyncio.run(run(admin_write(), *hunts))
+    assert settings_registry.load().max_hunger == 4
+    assert curr_hunts(players) == {cat.name: limit for cats in players.values() for cat in cats}
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from telegram.error import BadRequest, RetryAfter
+
+import bot.notifications
+from bot.notifications import MESSAGE_LIMIT, Digest, NotificationQueue, TokenBucket
+
+
+class FakeBot:
+    """Records delivered messages, raises the queued errors for a chat before delivering to it."""
+
+    def __init__(self, errors: dict[int, list[Exception]] | None = None) -> None:
+        self.errors = errors or {}
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if self.errors.get(chat_id):
+            raise self.errors[chat_id].pop(0)
+        self.sent.append((chat_id, text))
+
+
+class FakeQueue:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+
+    def send(self, chat_id: int, text: str) -> None:
+        self.sent.append((chat_id, text))
+
+
+def deliver(fake_bot: FakeBot, messages: list[tuple[int, str]]) -> NotificationQueue:
+    async def run() -> NotificationQueue:
+        queue = NotificationQueue(global_rate=1000, chat_rate=1000)
+        queue.start(fake_bot)  # type: ignore
+        for chat_id, text in messages:
+            queue.send(chat_id, text)
+        await queue.stop(timeout=10)
+        return queue
+
+    return asyncio.run(run())
+
+
+def test_flood_control_pauses_only_that_chat():
+    """Chat 1 waits an hour, chat 2 drains meanwhile. wait_for only guards against a hang."""
+    fake_bot = FakeBot({1: [RetryAfter(3600)]})
+
+    async def run() -> NotificationQueue:
+        queue = NotificationQueue(global_rate=1000, chat_rate=1000)
+        queue.start(fake_bot)  # type: ignore
+        for chat_id, text in [(1, "a1"), (1, "a2"), (2, "b1"), (2, "b2"), (2, "b3")]:
+            queue.send(chat_id, text)
+        await asyncio.wait_for(queue._workers[2], timeout=10)
+        await queue.stop(timeout=0)
+        return queue
+
+    queue = asyncio.run(run())
+    assert fake_bot.sent == [(2, "b1"), (2, "b2"), (2, "b3")]
+    assert queue.pending == 2
+
+
+def test_flood_controlled_message_is_retried():
+    fake_bot = FakeBot({1: [RetryAfter(0)]})
+    queue = deliver(fake_bot, [(1, "a1"), (1, "a2"), (2, "b1")])
+    assert queue.pending == 0
+    assert [text for chat, text in fake_bot.sent if chat == 1] == ["a1", "a2"]
+    assert (2, "b1") in fake_bot.sent
+
+
+def test_failed_message_is_dropped():
+    fake_bot = FakeBot({1: [BadRequest("Chat not found")]})
+    deliver(fake_bot, [(1, "a1"), (1, "a2")])
+    assert fake_bot.sent == [(1, "a2")]
+
+
+def test_digest_merges_lines():
+    queue = FakeQueue()
+    digest = Digest(queue, 5, "Итоги:")  # type: ignore
+    for line in ("Кот1 - 6 лун", "Кот2 - 12 лун", "Кот3 - 6 лун"):
+        digest.add(line)
+    digest.send()
+    digest.send()
+    assert queue.sent == [(5, "Итоги:\nКот1 - 6 лун\nКот2 - 12 лун\nКот3 - 6 лун")]
+
+
+def test_digest_splits_at_message_limit():
+    queue = FakeQueue()
+    digest = Digest(queue, 5, "Итоги:")  # type: ignore
+    lines = [str(i) * 1000 for i in range(9)]
+    for line in lines:
+        digest.add(line)
+    digest.send()
+    assert len(queue.sent) == 3
+    assert all(len(text) <= MESSAGE_LIMIT for _, text in queue.sent)
+    assert "\n".join(text for _, text in queue.sent) == "\n".join(["Итоги:", *lines])
+
+
+def test_digest_without_chat_sends_nothing():
+    queue = FakeQueue()
+    digest = Digest(queue, None, "Итоги:")  # type: ignore
+    digest.add("Кот1 - 6 лун")
+    digest.send()
+    assert queue.sent == []
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [0.0]
+    monkeypatch.setattr(bot.notifications, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        asyncio.run(bucket.acquire())
+    assert bucket.tokens == 0
+    clock[0] += 0.5
+    bucket._refill()
+    assert bucket.tokens == 1
+    clock[0] += 10
+    bucket._refill()
+    assert bucket.tokens == 3
+
+
+def test_token_bucket_pause(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    bucket.pause(1.5)
+    assert bucket.tokens == -3
+    clock[0] += 1.5
+    bucket._refill()
+    assert bucket.tokens == 0
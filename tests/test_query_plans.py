@@ -0,0 +1,45 @@
+import importlib.util
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlmodel import SQLModel
+
+from db import find_table_scans
+
+ROOT = Path(__file__).resolve().parent.parent
+LOOKUP_INDEXES = "8c2f4d6a1b90"
+
+
+def lookup_indexes_migration():
+    path = next((ROOT / "alembic" / "versions").glob(f"{LOOKUP_INDEXES}_*.py"))
+    spec = importlib.util.spec_from_file_location("lookup_indexes", path)
+    module = importlib.util.module_from_spec(spec)  # type: ignore
+    spec.loader.exec_module(module)  # type: ignore
+    return module
+
+
+def test_bot_schema_has_no_table_scans():
+    assert find_table_scans() == {}
+
+
+def test_lookup_indexes_migration_removes_table_scans(tmp_path):
+    """A database from before the lookup indexes gets index-backed plans from the migration alone."""
+    url = f"sqlite:///{tmp_path / 'cats.db'}"
+    migration = lookup_indexes_migration()
+    old = create_engine(url)
+    SQLModel.metadata.create_all(old)
+    with old.begin() as c:
+        for name, _, _ in migration.INDEXES:
+            c.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        c.execute(text("DROP INDEX IF EXISTS ix_characters_active"))
+    old.dispose()
+    assert find_table_scans(url)
+
+    config = Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.stamp(config, migration.down_revision)
+    command.upgrade(config, LOOKUP_INDEXES)
+    assert find_table_scans(url) == {}
@@ -0,0 +1,15 @@
+from sqlmodel import select
+
+from db import DbBrowser, Herbs, engine
+
+
+def test_pooled_connections_keep_foreign_keys_off():
+    with engine.connect() as c:
+        assert c.exec_driver_sql("PRAGMA foreign_keys").scalar() == 0
+
+
+def test_neutral_ground_herb_can_be_written():
+    db = DbBrowser()
+    db.add(Herbs(name="Ромашка", territory=-1, rarity_min=0, rarity_max=10))
+    herb = db.select_one(select(Herbs).where(Herbs.name == "Ромашка"))
+    assert herb.territory == -1
@@ -0,0 +1,75 @@
+from itertools import count
+
+import pytest
+from sqlmodel import delete, select, update
+
+from db import (Buffs, BuffsStats, CharacterBuffs, CharacterInventory, Characters, CharacterStatModifiers,
+                DbBrowser, Injuries, InjuryStat, Players)
+from db.injuries import DbInjuryCharacter
+
+_ids = count(9000)
+
+
+@pytest.fixture
+def cat() -> Characters:
+    db = DbBrowser()
+    chat_id = next(_ids)
+    db.add(Players(chat_id=chat_id, username=f"u{chat_id}"))
+    db.add(Characters(name=f"Кот{chat_id}", player_chat_id=chat_id, age=20))
+    return db.select_one(select(Characters).where(Characters.player_chat_id == chat_id))
+
+
+def buff(increase: int) -> Buffs:
+    db = DbBrowser()
+    name = f"Бафф{next(_ids)}"
+    db.add(Buffs(name=name))
+    buff = db.select_one(select(Buffs).where(Buffs.name == name))
+    db.add(BuffsStats(buff=buff.no, stat="hunting", increase=increase))
+    return buff
+
+
+def injury(penalty: int) -> Injuries:
+    db = DbBrowser()
+    name = f"Травма{next(_ids)}"
+    db.add(Injuries(name=name))
+    injury = db.select_one(select(Injuries).where(Injuries.name == name))
+    db.add(InjuryStat(issue=injury.no, stat="hunting", penalty=penalty))
+    return injury
+
+
+def modifiers(cat: Characters) -> dict[str, int]:
+    query = select(CharacterStatModifiers).where(CharacterStatModifiers.character == cat.no)
+    return {row.stat: row.total_delta for row in DbBrowser().select_many(query)}
+
+
+def test_buff_and_injury_changes(cat):
+    db = DbBrowser()
+    db.add(CharacterBuffs(buff=buff(2).no, character=cat.no))
+    assert modifiers(cat) == {"hunting": 2}
+
+    bruise = injury(-3)
+    DbInjuryCharacter(cat.no, bruise.no).add_injury()
+    assert modifiers(cat) == {"hunting": -1}
+
+    DbInjuryCharacter(cat.no, bruise.no).remove_injury()
+    assert modifiers(cat) == {"hunting": 2}
+
+
+def test_bulk_update_and_delete(cat):
+    db = DbBrowser()
+    strong = buff(2)
+    db.add(CharacterBuffs(buff=strong.no, character=cat.no))
+
+    assert db.update(update(BuffsStats).where(BuffsStats.buff == strong.no).values(increase=4)) == 1
+    assert modifiers(cat) == {"hunting": 4}
+
+    with db.transaction() as s:
+        s.exec(delete(CharacterBuffs).where(CharacterBuffs.character == cat.no))  # type: ignore
+    assert modifiers(cat) == {}
+
+
+def test_inventory_change_keeps_modifiers(cat):
+    db = DbBrowser()
+    db.add(CharacterBuffs(buff=buff(1).no, character=cat.no))
+    db.add(CharacterInventory(char_no=cat.no, type="herb", item=1))
+    assert modifiers(cat) == {"hunting": 1}
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from sqlmodel import select
+
+from db import DbBrowser, Players, UnitOfWork, as_engine
+from exceptions import MixedSessionWriteError
+
+
+def players(*chat_ids: int) -> list[int]:
+    query = select(Players.chat_id).where(Players.chat_id.in_(chat_ids))  # type: ignore
+    return list(DbBrowser().select_many(query))
+
+
+async def disposing(coro):
+    try:
+        return await coro
+    finally:
+        await as_engine.dispose()
+
+
+def test_write_through_second_session_fails_fast():
+    async def mixed() -> None:
+        async with UnitOfWork():
+            await DbBrowser().as_add(Players(chat_id=8001, username="async"))
+            DbBrowser().add(Players(chat_id=8002, username="sync"))
+
+    with pytest.raises(MixedSessionWriteError):
+        asyncio.run(disposing(mixed()))
+    assert players(8001, 8002) == []
+
+
+def test_write_through_second_session_after_checkpoint():
+    async def mixed() -> None:
+        async with UnitOfWork() as uow:
+            await DbBrowser().as_add(Players(chat_id=8003, username="async"))
+            await uow.checkpoint()
+            await asyncio.to_thread(DbBrowser().add, Players(chat_id=8004, username="sync"))
+
+    asyncio.run(disposing(mixed()))
+    assert sorted(players(8003, 8004)) == [8003, 8004]
+
+
+def test_reads_through_second_session_are_allowed():
+    async def mixed() -> None:
+        async with UnitOfWork():
+            await DbBrowser().as_add(Players(chat_id=8005, username="async"))
+            DbBrowser().select_many(select(Players))
+
+    asyncio.run(disposing(mixed()))
+    assert players(8005) == [8005]